@@ -0,0 +1,988 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Stockage colonnaire en mémoire des alertes Zabbix
+"""
+
+import json
+import mmap
+import os
+import re
+import sys
+from array import array
+from collections import Counter
+from itertools import compress, repeat
+from operator import add, countOf, floordiv, mod, mul
+from typing import Dict, List, Any, Optional, Callable, Iterable, Iterator, Sequence, Set, Tuple
+
+from sketches import DDSketch, ZERO_KEY
+
+
+# Champs calculés à partir des tags, ajoutés après les colonnes du CSV
+DERIVED_FIELDS = ('hostname', 'hostname_short', 'team', 'namespace')
+
+# Colonnes nécessaires aux champs parsés, conservées même si absentes du CSV
+SOURCE_FIELDS = ('Tags', 'Problème')
+
+# Valeur des colonnes numériques lorsque la conversion a échoué
+MISSING = -2**63
+
+# En-tête des fichiers binaires écrits par AlertTable.save
+STORAGE_MAGIC = b'ZBXTBL01'
+
+# Colonne numérique (secondes depuis l'epoch) sur laquelle portent les agrégats horaires
+ROLLUP_CLOCK = 'Temps_epoch'
+
+# Colonne numérique dont la distribution par code est résumée par les sketches
+SKETCH_VALUES = 'Durée_minutes'
+
+
+class EncodedColumn:
+    """Colonne encodée par dictionnaire: chaque valeur distincte n'est stockée qu'une fois
+
+    Pour une table relue depuis un fichier binaire, codes est une vue sur le
+    fichier projeté en mémoire et les valeurs distinctes ne sont décodées
+    qu'au premier accès.
+    """
+
+    __slots__ = ('_values', 'codes', '_lookup', '_loader')
+
+    def __init__(self) -> None:
+        self._values: Optional[List[Any]] = []
+        self.codes: Sequence[int] = array('I')
+        self._lookup: Optional[Dict[Any, int]] = {}
+        self._loader: Optional[Callable[[], List[Any]]] = None
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def values(self) -> List[Any]:
+        """Valeurs distinctes, dans l'ordre des codes"""
+        if self._values is None:
+            self._values = self._loader()
+            self._loader = None
+        return self._values
+
+    @classmethod
+    def from_storage(cls, codes: Sequence[int], loader: Callable[[], List[Any]]) -> 'EncodedColumn':
+        """Colonne relue depuis un fichier binaire, valeurs décodées à la demande"""
+        column = cls()
+        column.codes = codes
+        column._values, column._lookup, column._loader = None, None, loader
+        return column
+
+    def thaw(self) -> None:
+        """Copie la colonne en mémoire pour pouvoir y ajouter des lignes"""
+        if not isinstance(self.codes, array):
+            self.codes = array('I', self.codes.tobytes())
+
+    def _build_lookup(self) -> Dict[Any, int]:
+        self._lookup = dict(zip(self.values, range(len(self.values))))
+        return self._lookup
+
+    def encode(self, value: Any) -> int:
+        """Retourne le code de la valeur, en l'ajoutant au dictionnaire si besoin"""
+        lookup = self._lookup
+        if lookup is None:
+            lookup = self._build_lookup()
+        code = lookup.get(value)
+        if code is None:
+            code = len(self._values)
+            lookup[value] = code
+            self._values.append(value)
+        return code
+
+    def encode_many(self, values: Sequence[Any]) -> List[int]:
+        """Codes de valeurs distinctes, les nouvelles étant ajoutées dans l'ordre"""
+        lookup = self._lookup
+        if lookup is None:
+            lookup = self._build_lookup()
+        known = self._values
+        new = [value for value in values if value not in lookup]
+        lookup.update(zip(new, range(len(known), len(known) + len(new))))
+        known.extend(new)
+        return list(map(lookup.__getitem__, values))
+
+    def append(self, value: Any) -> int:
+        """Ajoute une valeur en fin de colonne et retourne son code"""
+        code = self.encode(value)
+        self.codes.append(code)
+        return code
+
+    def get(self, row_id: int) -> Any:
+        """Retourne la valeur de la ligne row_id"""
+        return self.values[self.codes[row_id]]
+
+
+# Tables de conversion entre octets 0/1 et chiffres binaires ASCII
+_FLAGS_TO_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+_DIGITS_TO_FLAGS = bytes.maketrans(b'01', b'\x00\x01')
+
+# Nombre de bits à 1 d'un entier (int.bit_count n'existe qu'à partir de Python 3.10)
+popcount = getattr(int, 'bit_count', None) or (lambda bitmap: bin(bitmap).count('1'))
+
+
+# Positions des bits à 1 de chaque octet, et motif des octets non nuls
+_BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+_NONZERO_BYTE = re.compile(b'[^\x00]')
+
+
+def bitmap_ids(bitmap: int) -> List[int]:
+    """Liste croissante des positions des bits à 1 d'un bitmap"""
+    if not bitmap:
+        return []
+    if popcount(bitmap) * 16 < bitmap.bit_length():
+        # Bitmap clairsemé: seuls les octets non nuls sont examinés
+        data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+        row_ids: List[int] = []
+        for match in _NONZERO_BYTE.finditer(data):
+            position = match.start()
+            base = position * 8
+            row_ids.extend([base + bit for bit in _BYTE_BITS[data[position]]])
+        return row_ids
+    flags = bin(bitmap)[:1:-1].encode('ascii').translate(_DIGITS_TO_FLAGS)
+    return list(compress(range(len(flags)), flags))
+
+
+def bitmap_flags(bitmap: int, size: int) -> bytes:
+    """Octet 0 ou 1 par ligne d'une table de size lignes, selon le bit de la ligne dans le bitmap"""
+    return bin(bitmap)[:1:-1].encode('ascii').translate(_DIGITS_TO_FLAGS)[:size].ljust(size, b'\x00')
+
+
+def ids_bitmap(row_ids: Iterable[int], size: int) -> int:
+    """Bitmap dont les bits à 1 sont les lignes indiquées"""
+    bits = bytearray((size + 7) // 8)
+    for row_id in row_ids:
+        bits[row_id >> 3] |= 1 << (row_id & 7)
+    return int.from_bytes(bits, 'little')
+
+
+class ColumnIndex:
+    """Index inversé d'une colonne encodée: valeur -> lignes qui la portent
+
+    Les listes de lignes (posting lists) sont stockées bout à bout dans un seul
+    tableau trié par code. Les bitmaps (entiers Python dont le bit i représente
+    la ligne i) sont calculés à la demande et conservés pour les intersections.
+    """
+
+    __slots__ = ('column', 'order', 'offsets', '_bitmaps')
+
+    def __init__(self, column: EncodedColumn) -> None:
+        self.column = column
+        codes = column.codes
+        # Répartition des lignes par code, en ordre croissant de ligne
+        buckets: List[List[int]] = [[] for _ in column.values]
+        appenders = [bucket.append for bucket in buckets]
+        for row_id, code in enumerate(codes):
+            appenders[code](row_id)
+        self.order = array('I')
+        self.offsets = array('I', [0])
+        for bucket in buckets:
+            self.order.extend(bucket)
+            self.offsets.append(len(self.order))
+        self._bitmaps: Dict[int, int] = {}
+
+    @classmethod
+    def from_storage(cls, column: EncodedColumn, order: Sequence[int], offsets: Sequence[int]) -> 'ColumnIndex':
+        """Index relu depuis un fichier binaire, sans reconstruction"""
+        index = object.__new__(cls)
+        index.column, index.order, index.offsets = column, order, offsets
+        index._bitmaps = {}
+        return index
+
+    def extend(self, start: int) -> None:
+        """Ajoute à l'index les lignes de la colonne à partir de start
+
+        Seules les nouvelles lignes sont réparties par code; les listes des
+        codes existants sont recopiées telles quelles et seuls les bitmaps des
+        codes ayant reçu des lignes sont oubliés.
+        """
+        codes = self.column.codes
+        buckets: Dict[int, List[int]] = {}
+        for row_id in range(start, len(codes)):
+            buckets.setdefault(codes[row_id], []).append(row_id)
+        order = self.order if isinstance(self.order, array) else array('I', self.order.tobytes())
+        offsets = self.offsets
+        known = len(offsets) - 1
+
+        # Listes existantes copiées par tranches, nouvelles lignes insérées après celles de leur code
+        new_order = array('I')
+        position = 0
+        for code in sorted(buckets):
+            end = offsets[min(code, known - 1) + 1] if known else 0
+            new_order.extend(order[position:end])
+            new_order.extend(buckets[code])
+            position = end
+        new_order.extend(order[position:])
+
+        new_offsets = array('I', [0])
+        added = 0
+        for code in range(len(self.column.values)):
+            added += len(buckets.get(code, ()))
+            new_offsets.append(offsets[min(code + 1, known)] + added)
+        self.order, self.offsets = new_order, new_offsets
+        for code in buckets:
+            self._bitmaps.pop(code, None)
+
+    def count(self, code: int) -> int:
+        """Nombre de lignes portant le code"""
+        return self.offsets[code + 1] - self.offsets[code]
+
+    def postings(self, code: int) -> Sequence[int]:
+        """Lignes portant le code, en ordre croissant"""
+        return self.order[self.offsets[code]:self.offsets[code + 1]]
+
+    def bitmap(self, code: int) -> int:
+        """Bitmap des lignes portant le code"""
+        bitmap = self._bitmaps.get(code)
+        if bitmap is None:
+            codes = self.column.codes
+            if self.count(code) * 32 > len(codes):
+                # Code fréquent: construction en C à partir de la colonne entière
+                flags = bytes(map(code.__eq__, codes)).translate(_FLAGS_TO_DIGITS)
+                bitmap = int(flags[::-1], 2) if flags else 0
+            else:
+                bitmap = ids_bitmap(self.postings(code), len(codes))
+            self._bitmaps[code] = bitmap
+        return bitmap
+
+    def union(self, codes: Iterable[int]) -> int:
+        """Bitmap des lignes portant l'un des codes"""
+        bitmap = 0
+        for code in codes:
+            bitmap |= self.bitmap(code)
+        return bitmap
+
+
+class NgramIndex:
+    """Index de trigrammes sur les valeurs distinctes d'une colonne
+
+    Sert aux recherches partielles insensibles à la casse: les trigrammes de la
+    valeur recherchée réduisent les candidats avant la vérification finale, qui
+    se fait sur le texte en minuscules conservé une fois pour toutes. Relu
+    depuis un fichier binaire, l'index garde ses listes de codes projetées et
+    ne reconstruit son dictionnaire qu'au premier accès.
+    """
+
+    __slots__ = ('_lowered', '_grams', '_loader', '_mapped')
+
+    N = 3
+
+    def __init__(self, column: EncodedColumn) -> None:
+        self._lowered: Optional[List[str]] = []
+        self._grams: Optional[Dict[str, Sequence[int]]] = {}
+        self._loader: Optional[Callable[[], Tuple[List[str], Dict[str, Sequence[int]]]]] = None
+        self._mapped = False
+        for value in column.values:
+            self.add(value)
+
+    @classmethod
+    def from_storage(cls, column: EncodedColumn, grams: Callable[[], List[str]],
+                     offsets: Sequence[int], codes: Sequence[int]) -> 'NgramIndex':
+        """Index relu depuis un fichier binaire (voir storage), sans reconstruction"""
+        def load() -> Tuple[List[str], Dict[str, Sequence[int]]]:
+            lowered = [(value or '').lower() for value in column.values]
+            return lowered, {gram: codes[offsets[i]:offsets[i + 1]] for i, gram in enumerate(grams())}
+        index = object.__new__(cls)
+        index._lowered = index._grams = None
+        index._loader, index._mapped = load, True
+        return index
+
+    @property
+    def lowered(self) -> List[str]:
+        if self._lowered is None:
+            self._lowered, self._grams = self._loader()
+        return self._lowered
+
+    @property
+    def grams(self) -> Dict[str, Sequence[int]]:
+        if self._grams is None:
+            self._lowered, self._grams = self._loader()
+        return self._grams
+
+    def storage(self) -> Tuple[List[str], array, array]:
+        """Trigrammes, positions et listes de codes mises bout à bout, pour l'enregistrement"""
+        names = list(self.grams)
+        offsets = array('I', [0])
+        codes = array('I')
+        for gram in names:
+            codes.extend(self.grams[gram])
+            offsets.append(len(codes))
+        return names, offsets, codes
+
+    def add(self, value: Any) -> None:
+        """Indexe la valeur suivante de la colonne"""
+        lowered = self.lowered
+        code = len(lowered)
+        text = (value or '').lower()
+        lowered.append(text)
+        grams = self.grams
+        for gram in {text[i:i + self.N] for i in range(len(text) - self.N + 1)}:
+            codes = grams.get(gram)
+            if codes is None:
+                codes = grams[gram] = array('I')
+            codes.append(code)
+
+    def extend(self, column: EncodedColumn) -> None:
+        """Indexe les valeurs distinctes ajoutées à la colonne depuis la construction"""
+        if self._mapped:
+            # Listes projetées depuis le fichier: copiées en mémoire avant l'ajout
+            self._grams = {gram: array('I', codes) for gram, codes in self.grams.items()}
+            self._mapped = False
+        for value in column.values[len(self.lowered):]:
+            self.add(value)
+
+    def search(self, needle: str) -> Set[int]:
+        """Codes des valeurs contenant needle (déjà en minuscules)"""
+        lowered = self.lowered
+        if len(needle) < self.N:
+            return {code for code, text in enumerate(lowered) if needle in text}
+        
+        # Intersection des listes des trigrammes, de la plus courte à la plus longue
+        postings = sorted((self.grams.get(needle[i:i + self.N], ())
+                           for i in range(len(needle) - self.N + 1)), key=len)
+        candidates = set(postings[0])
+        for codes in postings[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(codes)
+        return {code for code in candidates if needle in lowered[code]}
+
+
+class HourlyRollup:
+    """Nombre de lignes par heure et par code d'une colonne encodée
+
+    Les triplets (heure, code, nombre) sont stockés dans trois tableaux
+    alignés, dans l'ordre de première apparition; l'heure est comptée
+    depuis l'epoch et les lignes sans date lisible ne sont pas comptées. Les
+    histogrammes par période multiple de l'heure s'en déduisent sans
+    parcourir les lignes.
+    """
+
+    __slots__ = ('hours', 'codes', 'counts')
+
+    def __init__(self, hours: Sequence[int], codes: Sequence[int], counts: Sequence[int]) -> None:
+        self.hours, self.codes, self.counts = hours, codes, counts
+
+    @classmethod
+    def from_rows(cls, epochs: Sequence[int], codes: Sequence[int],
+                  row_ids: Optional[Sequence[int]] = None) -> 'HourlyRollup':
+        """Agrégat des lignes indiquées (toutes par défaut)"""
+        width = max(codes, default=0) + 1
+        return cls._from_keys(Counter(_hourly_keys(epochs, codes, width, row_ids)), width)
+
+    @classmethod
+    def _from_keys(cls, counts: Dict[int, int], width: int) -> 'HourlyRollup':
+        """Agrégat des comptages par clé heure * width + code"""
+        # Les lignes sans date lisible ont les plus petites clés
+        threshold = (MISSING // 3600 + 1) * width
+        if counts and min(counts) < threshold:
+            counts = {key: count for key, count in counts.items() if key >= threshold}
+        return cls(array('q', map(floordiv, counts, repeat(width))), array('I', map(mod, counts, repeat(width))),
+                   array('I', counts.values()))
+
+    def items(self) -> Iterator[Tuple[int, int, int]]:
+        """Triplets (heure, code, nombre)"""
+        return zip(self.hours, self.codes, self.counts)
+
+    def extend(self, epochs: Sequence[int], codes: Sequence[int], start: int) -> None:
+        """Ajoute à l'agrégat les lignes à partir de start"""
+        width = max(codes, default=0) + 1
+        counts = Counter(dict(zip(map(add, map(mul, self.hours, repeat(width)), self.codes), self.counts)))
+        counts.update(_hourly_keys(epochs, codes, width, range(start, len(codes))))
+        merged = self._from_keys(counts, width)
+        self.hours, self.codes, self.counts = merged.hours, merged.codes, merged.counts
+
+
+def _hourly_keys(epochs: Sequence[int], codes: Sequence[int], width: int,
+                 row_ids: Optional[Sequence[int]] = None) -> Iterator[int]:
+    """Clé heure * width + code de chacune des lignes indiquées (toutes par défaut)"""
+    if row_ids is not None:
+        epochs, codes = map(epochs.__getitem__, row_ids), map(codes.__getitem__, row_ids)
+    return map(add, map(mul, map(floordiv, epochs, repeat(3600)), repeat(width)), codes)
+
+
+class SketchRollup:
+    """Distribution des valeurs d'une colonne numérique par code d'une colonne encodée
+
+    Les triplets (code, case DDSketch, nombre) sont stockés dans trois
+    tableaux alignés, dans l'ordre de première apparition, avec la somme
+    exacte des valeurs de chaque code; les valeurs MISSING ne sont pas
+    comptées. Le DDSketch d'un ensemble de codes s'en déduit sans
+    parcourir les lignes.
+    """
+
+    __slots__ = ('codes', 'keys', 'counts', 'sums')
+
+    def __init__(self, codes: Sequence[int], keys: Sequence[int], counts: Sequence[int], sums: Sequence[int]) -> None:
+        self.codes, self.keys, self.counts, self.sums = codes, keys, counts, sums
+
+    @classmethod
+    def from_rows(cls, values: Sequence[int], codes: Sequence[int], row_ids: Optional[Sequence[int]] = None,
+                  keys: Optional[Sequence[int]] = None) -> 'SketchRollup':
+        """Distribution des lignes indiquées (toutes par défaut)
+
+        keys sont les cases de toutes les lignes (sketch_keys), si elles sont déjà calculées.
+        """
+        if keys is None:
+            keys = sketch_keys(values if row_ids is None else array('q', map(values.__getitem__, row_ids)))
+        elif row_ids is not None:
+            keys = array('q', map(keys.__getitem__, row_ids))
+        if row_ids is not None:
+            values, codes = array('q', map(values.__getitem__, row_ids)), array('I', map(codes.__getitem__, row_ids))
+        width = max(codes, default=0) + 1
+        counts = Counter(map(add, map(mul, keys, repeat(width)), codes))
+        return cls._from_keys(counts, width, _code_sums(values, codes, [0] * width))
+
+    @classmethod
+    def _from_keys(cls, counts: Dict[int, int], width: int, sums: array) -> 'SketchRollup':
+        """Distribution des comptages par clé case * width + code"""
+        # Les lignes de valeur MISSING ont les plus petites clés
+        threshold = ZERO_KEY * width
+        if counts and min(counts) < threshold:
+            counts = {key: count for key, count in counts.items() if key >= threshold}
+        return cls(array('I', map(mod, counts, repeat(width))), array('i', map(floordiv, counts, repeat(width))),
+                   array('I', counts.values()), sums)
+
+    def items(self) -> Iterator[Tuple[int, int, int]]:
+        """Triplets (code, case, nombre)"""
+        return zip(self.codes, self.keys, self.counts)
+
+    def extend(self, values: Sequence[int], codes: Sequence[int], start: int) -> None:
+        """Ajoute à la distribution les lignes à partir de start"""
+        width = max(codes, default=0) + 1
+        counts = Counter(dict(zip(map(add, map(mul, self.keys, repeat(width)), self.codes), self.counts)))
+        added = range(start, len(codes))
+        values, codes = array('q', map(values.__getitem__, added)), array('I', map(codes.__getitem__, added))
+        counts.update(map(add, map(mul, sketch_keys(values), repeat(width)), codes))
+        sums = list(self.sums)
+        sums.extend(repeat(0, width - len(sums)))
+        merged = self._from_keys(counts, width, _code_sums(values, codes, sums))
+        self.codes, self.keys, self.counts, self.sums = merged.codes, merged.keys, merged.counts, merged.sums
+
+
+def sketch_keys(values: Sequence[int]) -> array:
+    """Case DDSketch de chaque valeur (MISSING pour une valeur MISSING)"""
+    keys = {value: MISSING if value == MISSING else DDSketch.key(value) for value in set(values)}
+    return array('q', map(keys.__getitem__, values))
+
+
+def _code_sums(values: Sequence[int], codes: Sequence[int], sums: List[int]) -> array:
+    """Ajoute à sums (indexé par code) les valeurs de chaque ligne, hors MISSING"""
+    if countOf(values, MISSING):
+        for code, value in zip(codes, values):
+            if value != MISSING:
+                sums[code] += value
+    else:
+        for code, value in zip(codes, values):
+            sums[code] += value
+    return array('q', sums)
+
+
+class AlertTable:
+    """Table d'alertes stockée par colonnes
+
+    Les lignes sont reconstruites à la demande sous la forme des dictionnaires
+    produits historiquement par read_csv_file. Une table peut être une vue sur
+    un sous-ensemble de lignes d'une autre table: les colonnes sont alors
+    partagées et seuls les identifiants de lignes sont conservés.
+    """
+
+    def __init__(self, fieldnames: Sequence[str],
+                 numeric: Optional[Dict[str, Tuple[str, Any, Callable[[Any], int]]]] = None) -> None:
+        self.fieldnames = list(fieldnames)
+        self._stored = self.fieldnames + [
+            name for name in SOURCE_FIELDS + DERIVED_FIELDS if name not in self.fieldnames
+        ]
+        self.columns: Dict[str, EncodedColumn] = {name: EncodedColumn() for name in self._stored}
+        # Valeurs parsées, alignées sur les valeurs distinctes de Tags et Problème
+        # (remplacées par une fonction de chargement pour une table relue depuis le disque)
+        self._parsed: Dict[str, Any] = {'Tags': [], 'Problème': []}
+        # Colonnes numériques dérivées: nom -> (champ source, valeur par défaut, conversion).
+        # La conversion n'est appliquée qu'une fois par valeur distincte du champ source.
+        self.converters = dict(numeric or {})
+        self.numeric: Dict[str, array] = {name: array('q') for name in self.converters}
+        self._numeric_values: Dict[str, List[int]] = {name: [] for name in self.converters}
+        # Index inversés des colonnes indexées, et bitmap des lignes d'une vue si connu
+        self.indexes: Dict[str, ColumnIndex] = {}
+        self.ngrams: Dict[str, NgramIndex] = {}
+        # Agrégats horaires de la table complète, par colonne (voir build_rollups)
+        self.rollups: Dict[str, HourlyRollup] = {}
+        # Distributions de SKETCH_VALUES de la table complète, par colonne (voir build_sketches)
+        self.sketches: Dict[str, SketchRollup] = {}
+        self.selection: Optional[int] = None
+        self.size = 0
+        self._ids: Optional[Sequence[int]] = None
+        # Fichier projeté en mémoire dont les colonnes sont des vues (voir load)
+        self._mapping: Optional[mmap.mmap] = None
+
+    def __len__(self) -> int:
+        return self.size if self._ids is None else len(self._ids)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row_id in self.row_ids():
+            yield self.row(row_id)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(self.row_ids()[index])
+        return self.row(self.row_ids()[index])
+
+    @property
+    def tags_parsed(self) -> List[Dict[str, str]]:
+        """Tags parsés, un dictionnaire par valeur distincte de Tags"""
+        return self._parsed_values('Tags')
+
+    @property
+    def problem_parsed(self) -> List[Dict[str, str]]:
+        """Problèmes parsés, un dictionnaire par valeur distincte de Problème"""
+        return self._parsed_values('Problème')
+
+    def _parsed_values(self, source: str) -> List[Dict[str, str]]:
+        parsed = self._parsed[source]
+        if callable(parsed):
+            parsed = self._parsed[source] = parsed()
+        return parsed
+
+    def append(self, row: Dict[str, Any]) -> None:
+        """Ajoute une ligne enrichie (Tags_parsed, Problème_parsed, hostname...)"""
+        if self._mapping is not None:
+            self._thaw()
+        # Les index ne sont plus à jour: ils seront reconstruits par build_indexes,
+        # build_ngram_indexes, build_rollups et build_sketches
+        if self.indexes or self.ngrams or self.rollups or self.sketches:
+            self.indexes.clear()
+            self.ngrams.clear()
+            self.rollups.clear()
+            self.sketches.clear()
+        columns = self.columns
+        for name in self._stored:
+            if name in SOURCE_FIELDS and name not in self.fieldnames:
+                columns[name].append(row.get(name, ''))
+            else:
+                columns[name].append(row.get(name))
+        parsed = self._parsed
+        if columns['Tags'].codes[-1] == len(parsed['Tags']):
+            parsed['Tags'].append(row['Tags_parsed'])
+        if columns['Problème'].codes[-1] == len(parsed['Problème']):
+            parsed['Problème'].append(row['Problème_parsed'])
+        for name, (source, default, convert) in self.converters.items():
+            if self.has_field(source):
+                column = columns[source]
+                code = column.codes[-1]
+                converted = self._numeric_values[name]
+                if code == len(converted):
+                    converted.append(convert(column.values[code]))
+                self.numeric[name].append(converted[code])
+            else:
+                self.numeric[name].append(convert(default))
+        self.size += 1
+
+    def extend(self, other: 'AlertTable') -> None:
+        """Ajoute à la fin les lignes d'une autre table de mêmes colonnes
+
+        Les codes de l'autre table sont réencodés dans les dictionnaires de
+        celle-ci; les valeurs nouvelles y sont ajoutées dans leur ordre
+        d'apparition, comme si les lignes avaient été ajoutées une à une.
+        Les index et agrégats existants sont mis à jour en place avec les
+        seules lignes ajoutées.
+        """
+        if other.fieldnames != self.fieldnames or other.is_view():
+            raise ValueError("tables incompatibles")
+        if self._mapping is not None:
+            self._thaw()
+        start = self.size
+        mappings: Dict[str, List[int]] = {}
+        for name, column in self.columns.items():
+            source = other.columns[name]
+            mapping = mappings[name] = column.encode_many(source.values)
+            if mapping == list(range(len(mapping))):
+                column.codes.extend(source.codes)
+            else:
+                column.codes.extend(_remap_codes(source.codes, mapping))
+        # Valeurs parsées et converties des valeurs distinctes nouvelles
+        for source, parsed in self._parsed.items():
+            parsed.extend(_new_entries(other._parsed_values(source), mappings[source], len(parsed)))
+        for name, (source, _, _) in self.converters.items():
+            self.numeric[name].extend(other.numeric[name])
+            if self.has_field(source):
+                converted = self._numeric_values[name]
+                converted.extend(_new_entries(other._numeric_values[name], mappings[source], len(converted)))
+        self.size += other.size
+        for index in self.indexes.values():
+            index.extend(start)
+        for name, ngrams in self.ngrams.items():
+            ngrams.extend(self.columns[name])
+        for name, rollup in self.rollups.items():
+            rollup.extend(self.numeric[ROLLUP_CLOCK], self.columns[name].codes, start)
+        for name, sketch in self.sketches.items():
+            sketch.extend(self.numeric[SKETCH_VALUES], self.columns[name].codes, start)
+
+    def gather(self, row_ids: Sequence[int]) -> 'AlertTable':
+        """Table complète formée des lignes indiquées, dans cet ordre
+
+        Contrairement à take, les colonnes sont copiées: les dictionnaires ne
+        gardent que les valeurs des lignes retenues, réencodées dans leur ordre
+        d'apparition. Le résultat est identique à celui de l'ajout des mêmes
+        lignes une à une, sans reparser ni reconvertir aucune valeur.
+        """
+        table = AlertTable(self.fieldnames, self.converters)
+        orders: Dict[str, List[int]] = {}
+        for name, column in self.columns.items():
+            codes = array('I', map(column.codes.__getitem__, row_ids))
+            values = column.values
+            order = orders[name] = list(dict.fromkeys(codes))
+            mapping = [0] * len(values)
+            for code, previous in enumerate(order):
+                mapping[previous] = code
+            target = table.columns[name]
+            target._values, target._lookup = [values[code] for code in order], None
+            target.codes = _remap_codes(codes, mapping)
+        for source in self._parsed:
+            parsed = self._parsed_values(source)
+            table._parsed[source] = [parsed[code] for code in orders[source]]
+        for name, (source, _, _) in self.converters.items():
+            table.numeric[name] = array('q', map(self.numeric[name].__getitem__, row_ids))
+            if self.has_field(source):
+                converted = self._numeric_values[name]
+                table._numeric_values[name] = [converted[code] for code in orders[source]]
+        table.size = len(row_ids)
+        return table
+
+    def _thaw(self) -> None:
+        """Copie en mémoire les colonnes projetées depuis le fichier, avant un ajout"""
+        for column in self.columns.values():
+            column.thaw()
+        for name in self.numeric:
+            self.numeric[name] = array('q', self.numeric[name].tobytes())
+            self._numeric_values[name] = list(self._numeric_values[name])
+        for source in self._parsed:
+            self._parsed_values(source)
+        self._mapping = None
+
+    def row_ids(self) -> Sequence[int]:
+        """Identifiants des lignes visibles dans cette table"""
+        return range(self.size) if self._ids is None else self._ids
+
+    def take(self, row_ids: Sequence[int], selection: Optional[int] = None) -> 'AlertTable':
+        """Retourne une vue limitée aux lignes indiquées
+
+        selection est le bitmap équivalent à row_ids, s'il est déjà connu.
+        """
+        view = object.__new__(AlertTable)
+        view.__dict__.update(self.__dict__)
+        view._ids = row_ids
+        view.selection = selection
+        return view
+
+    def complete(self) -> 'AlertTable':
+        """Table complète dont cette table est une vue (elle-même si ce n'est pas une vue)"""
+        if self._ids is None:
+            return self
+        table = object.__new__(AlertTable)
+        table.__dict__.update(self.__dict__)
+        table._ids, table.selection = None, None
+        return table
+
+    def is_view(self) -> bool:
+        """Indique si la table est une vue sur un sous-ensemble de lignes"""
+        return self._ids is not None
+
+    def build_indexes(self, fields: Iterable[str]) -> None:
+        """Construit les index inversés des champs indiqués présents dans la table"""
+        for field in fields:
+            if self.has_field(field) and field not in self.indexes:
+                self.indexes[field] = ColumnIndex(self.columns[field])
+
+    def build_ngram_indexes(self, fields: Iterable[str]) -> None:
+        """Construit les index de trigrammes des champs indiqués présents dans la table qui n'en ont pas encore"""
+        for field in fields:
+            if self.has_field(field) and field not in self.ngrams:
+                self.ngrams[field] = NgramIndex(self.columns[field])
+
+    def build_rollups(self, fields: Iterable[str]) -> None:
+        """Construit les agrégats horaires des colonnes indiquées qui n'en ont pas encore"""
+        if ROLLUP_CLOCK not in self.numeric:
+            return
+        for field in fields:
+            if field in self.columns and field not in self.rollups:
+                self.rollups[field] = HourlyRollup.from_rows(self.numeric[ROLLUP_CLOCK], self.columns[field].codes)
+
+    def rollup(self, field: str) -> HourlyRollup:
+        """Agrégat horaire des lignes visibles pour la colonne field
+
+        Celui de la table sert tel quel quand toutes ses lignes sont visibles;
+        sinon, ou s'il n'a pas été construit, il est calculé sur les lignes.
+        """
+        rollup = self.rollups.get(field)
+        if rollup is not None and len(self) == self.size:
+            return rollup
+        return HourlyRollup.from_rows(self.numeric[ROLLUP_CLOCK], self.columns[field].codes, self._ids)
+
+    def build_sketches(self, fields: Iterable[str]) -> None:
+        """Construit les distributions de SKETCH_VALUES des colonnes indiquées qui n'en ont pas encore"""
+        if SKETCH_VALUES not in self.numeric:
+            return
+        values = self.numeric[SKETCH_VALUES]
+        keys = None
+        for field in fields:
+            if field in self.columns and field not in self.sketches:
+                if keys is None:
+                    keys = sketch_keys(values)
+                self.sketches[field] = SketchRollup.from_rows(values, self.columns[field].codes, keys=keys)
+
+    def sketch(self, field: str) -> SketchRollup:
+        """Distribution de SKETCH_VALUES des lignes visibles par code de la colonne field
+
+        Celle de la table sert telle quelle quand toutes ses lignes sont
+        visibles; sinon, ou si elle n'a pas été construite, elle est calculée
+        sur les lignes.
+        """
+        sketch = self.sketches.get(field)
+        if sketch is not None and len(self) == self.size:
+            return sketch
+        return SketchRollup.from_rows(self.numeric[SKETCH_VALUES], self.columns[field].codes, self._ids)
+
+    def has_field(self, field: str) -> bool:
+        """Indique si le champ existe dans les lignes reconstruites"""
+        return field in self.fieldnames or field in DERIVED_FIELDS
+
+    def getter(self, field: str, default: Any = None) -> Callable[[int], Any]:
+        """Retourne une fonction row_id -> valeur, équivalente à row.get(field, default)"""
+        if not self.has_field(field):
+            return lambda row_id: default
+        column = self.columns[field]
+        values, codes = column.values, column.codes
+        return lambda row_id: values[codes[row_id]]
+
+    def count_missing(self, name: str) -> int:
+        """Nombre de lignes visibles dont la colonne numérique n'a pas pu être calculée"""
+        values = self.numeric[name]
+        if self._ids is None:
+            return countOf(values, MISSING)
+        return sum(1 for row_id in self._ids if values[row_id] == MISSING)
+
+    def tags(self, row_id: int) -> Dict[str, str]:
+        """Tags parsés de la ligne row_id (sans copie)"""
+        return self.tags_parsed[self.columns['Tags'].codes[row_id]]
+
+    def problem(self, row_id: int) -> Dict[str, str]:
+        """Problème parsé de la ligne row_id (sans copie)"""
+        return self.problem_parsed[self.columns['Problème'].codes[row_id]]
+
+    def row(self, row_id: int) -> Dict[str, Any]:
+        """Reconstruit le dictionnaire complet d'une ligne"""
+        columns = self.columns
+        row = {name: columns[name].get(row_id) for name in self.fieldnames}
+        row['Tags_parsed'] = dict(self.tags(row_id))
+        row['Problème_parsed'] = dict(self.problem(row_id))
+        for name in DERIVED_FIELDS:
+            row[name] = columns[name].get(row_id)
+        return row
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Reconstruit toutes les lignes visibles sous forme de liste de dictionnaires"""
+        return list(self)
+
+    def save(self, path: str, meta: Optional[Dict[str, Any]] = None) -> None:
+        """Enregistre la table dans un fichier binaire projetable en mémoire
+
+        Les codes, colonnes numériques, index inversés et de trigrammes,
+        agrégats horaires et distributions sont écrits bruts et alignés; les
+        valeurs distinctes, les valeurs parsées et les trigrammes sont écrits en
+        JSON. Le fichier est remplacé de façon atomique.
+        """
+        if self.is_view():
+            raise ValueError("seule une table complète peut être enregistrée")
+        sections: List[Tuple[str, Any]] = []
+        for name, column in self.columns.items():
+            sections.append((f'codes:{name}', column.codes))
+            sections.append((f'values:{name}', _json_bytes(column.values)))
+        for source in self._parsed:
+            sections.append((f'parsed:{source}', _json_bytes(self._parsed_values(source))))
+        for name in self.numeric:
+            sections.append((f'numeric:{name}', self.numeric[name]))
+            sections.append((f'converted:{name}', array('q', self._numeric_values[name])))
+        for name, index in self.indexes.items():
+            sections.append((f'order:{name}', index.order))
+            sections.append((f'offsets:{name}', index.offsets))
+        for name, ngrams in self.ngrams.items():
+            grams, offsets, codes = ngrams.storage()
+            sections.append((f'ngram_grams:{name}', _json_bytes(grams)))
+            sections.append((f'ngram_offsets:{name}', offsets))
+            sections.append((f'ngram_codes:{name}', codes))
+        for name, rollup in self.rollups.items():
+            sections.append((f'rollup_hours:{name}', rollup.hours))
+            sections.append((f'rollup_codes:{name}', rollup.codes))
+            sections.append((f'rollup_counts:{name}', rollup.counts))
+        for name, sketch in self.sketches.items():
+            sections.append((f'sketch_codes:{name}', sketch.codes))
+            sections.append((f'sketch_keys:{name}', sketch.keys))
+            sections.append((f'sketch_counts:{name}', sketch.counts))
+            sections.append((f'sketch_sums:{name}', sketch.sums))
+
+        # Position de chaque section, alignée sur 8 octets à partir du début des données
+        layout: Dict[str, Tuple[int, int]] = {}
+        buffers = []
+        position = 0
+        for key, data in sections:
+            buffer = memoryview(data).cast('B')
+            layout[key] = (position, len(buffer))
+            buffers.append(buffer)
+            position += _padding(len(buffer)) + len(buffer)
+        header = _json_bytes({
+            'meta': meta or {}, 'byteorder': sys.byteorder, 'size': self.size,
+            'fieldnames': self.fieldnames, 'numeric': list(self.numeric),
+            'indexes': list(self.indexes), 'ngrams': list(self.ngrams), 'rollups': list(self.rollups),
+            'sketches': list(self.sketches), 'sections': layout,
+        })
+
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(STORAGE_MAGIC + len(header).to_bytes(8, 'little') + header)
+                f.write(bytes(_padding(f.tell())))
+                for buffer in buffers:
+                    f.write(buffer)
+                    f.write(bytes(_padding(len(buffer))))
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @staticmethod
+    def read_header(path: str) -> Dict[str, Any]:
+        """Lit l'en-tête d'un fichier écrit par save, sans charger les données"""
+        with open(path, 'rb') as f:
+            return _parse_header(f.read(16), f.read)[0]
+
+    @classmethod
+    def load(cls, path: str,
+             numeric: Optional[Dict[str, Tuple[str, Any, Callable[[Any], int]]]] = None) -> 'AlertTable':
+        """Relit une table enregistrée par save en projetant le fichier en mémoire
+
+        Aucune donnée n'est copiée: les colonnes sont des vues sur le fichier et
+        les valeurs distinctes ne sont décodées qu'au premier accès. numeric
+        doit décrire les mêmes colonnes numériques que lors de l'enregistrement.
+        """
+        with open(path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header, start = _parse_header(mapping[:16], lambda size: mapping[16:16 + size])
+        table = cls(header['fieldnames'], numeric)
+        if header['byteorder'] != sys.byteorder or list(table.numeric) != header['numeric']:
+            raise ValueError("fichier enregistré avec un format incompatible")
+
+        view = memoryview(mapping)
+        layout = header['sections']
+
+        def section(key: str, fmt: str) -> memoryview:
+            offset, length = layout[key]
+            return view[start + offset:start + offset + length].cast(fmt)
+
+        def loader(key: str) -> Callable[[], Any]:
+            return lambda: json.loads(section(key, 'B').tobytes())
+
+        table.columns = {name: EncodedColumn.from_storage(section(f'codes:{name}', 'I'), loader(f'values:{name}'))
+                         for name in table._stored}
+        table._parsed = {source: loader(f'parsed:{source}') for source in table._parsed}
+        for name in table.numeric:
+            table.numeric[name] = section(f'numeric:{name}', 'q')
+            table._numeric_values[name] = section(f'converted:{name}', 'q')
+        for name in header['indexes']:
+            table.indexes[name] = ColumnIndex.from_storage(
+                table.columns[name], section(f'order:{name}', 'I'), section(f'offsets:{name}', 'I'))
+        for name in header.get('ngrams', []):
+            table.ngrams[name] = NgramIndex.from_storage(
+                table.columns[name], loader(f'ngram_grams:{name}'),
+                section(f'ngram_offsets:{name}', 'I'), section(f'ngram_codes:{name}', 'I'))
+        for name in header.get('rollups', []):
+            table.rollups[name] = HourlyRollup(
+                section(f'rollup_hours:{name}', 'q'), section(f'rollup_codes:{name}', 'I'),
+                section(f'rollup_counts:{name}', 'I'))
+        for name in header.get('sketches', []):
+            table.sketches[name] = SketchRollup(
+                section(f'sketch_codes:{name}', 'I'), section(f'sketch_keys:{name}', 'i'),
+                section(f'sketch_counts:{name}', 'I'), section(f'sketch_sums:{name}', 'q'))
+        table.size = header['size']
+        table._mapping = mapping
+        return table
+
+    @classmethod
+    def from_rows(cls, fieldnames: Sequence[str], rows: Iterable[Dict[str, Any]],
+                  numeric: Optional[Dict[str, Tuple[str, Any, Callable[[Any], int]]]] = None) -> 'AlertTable':
+        """Construit une table à partir de lignes enrichies"""
+        table = cls(fieldnames, numeric)
+        for row in rows:
+            table.append(row)
+        return table
+
+
+# Position de l'octet de poids faible d'un code dans sa représentation mémoire
+_LOW_BYTE = 0 if sys.byteorder == 'little' else 3
+
+
+def _remap_codes(codes: Sequence[int], mapping: List[int]) -> array:
+    """Codes traduits par mapping (ancien code -> nouveau code)"""
+    if len(mapping) <= 256 and max(mapping, default=0) < 256:
+        # Codes sur un octet: traduction en C de l'octet de poids faible de chaque code
+        table = bytes(mapping + [0] * (256 - len(mapping)))
+        raw = bytearray(4 * len(codes))
+        raw[_LOW_BYTE::4] = codes.tobytes()[_LOW_BYTE::4].translate(table)
+        return array('I', raw)
+    return array('I', [mapping[code] for code in codes])
+
+
+# Codes décalés de 1 (l'octet nul marque les lignes écartées) et masque des lignes retenues
+_SHIFTED_CODES = bytes(range(1, 256)) + b'\x00'
+_FLAGS_TO_MASK = bytes.maketrans(b'\x00\x01', b'\x00\xff')
+_CODE_BYTES = [bytes([code]) for code in range(256)]
+
+# Nombre maximal de codes d'une colonne comptés par flagged_code_counts (un parcours en C par code)
+SCAN_CODES = 32
+
+
+def flagged_code_counts(codes: Sequence[int], width: int, flags: bytes) -> Dict[int, int]:
+    """Nombre de lignes marquées par flags (octet 1) pour chaque code, dans l'ordre de première apparition
+
+    width, le nombre de codes de la colonne, ne dépasse pas SCAN_CODES: les
+    codes décalés de 1 sont masqués (octet nul hors sélection) puis chaque
+    code est cherché et compté en C, sans accès ligne à ligne en Python.
+    """
+    size = len(flags)
+    shifted = codes.tobytes()[_LOW_BYTE::4].translate(_SHIFTED_CODES)
+    mask = int.from_bytes(flags.translate(_FLAGS_TO_MASK), 'little')
+    selected = (int.from_bytes(shifted, 'little') & mask).to_bytes(size, 'little')
+    found = []
+    for code in range(width):
+        byte = _CODE_BYTES[code + 1]
+        position = selected.find(byte)
+        if position >= 0:
+            found.append((position, code, selected.count(byte)))
+    found.sort()
+    return {code: count for _, code, count in found}
+
+
+def _new_entries(entries: Sequence[Any], mapping: Sequence[int], known: int) -> List[Any]:
+    """Entrées correspondant aux codes réencodés au-delà des known premiers"""
+    return [entry for entry, code in zip(entries, mapping) if code >= known]
+
+
+def _json_bytes(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _padding(size: int) -> int:
+    """Nombre d'octets à ajouter pour aligner size sur 8"""
+    return -size % 8
+
+
+def _parse_header(prefix: bytes, read: Callable[[int], bytes]) -> Tuple[Dict[str, Any], int]:
+    """Décode l'en-tête d'un fichier binaire et retourne (en-tête, début des données)"""
+    if len(prefix) != 16 or prefix[:8] != STORAGE_MAGIC:
+        raise ValueError("fichier binaire de table invalide")
+    size = int.from_bytes(prefix[8:], 'little')
+    header = json.loads(read(size))
+    return header, 16 + size + _padding(16 + size)
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks du moteur d'analyse sur un export Zabbix synthétique
+"""
+
+import argparse
+import csv
+import gc
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Optional
+
+import parse_zbx_problems as zbx
+import table_cache
+from alert_table import popcount
+
+
+SEVERITES = ["Information", "Avertissement", "Moyen", "Élevé", "Désastre"]
+ETATS = ["PROBLÈME", "RÉSOLU"]
+TEAMS = ["mcx", "infra", "dba", "net", "secu"]
+NAMESPACES = ["prod", "preprod", "dev", "kube-system"]
+TITRES = ["CPU élevé", "Disque plein", "Service down", "Latence réseau", "Mémoire saturée"]
+
+
+def generate_export(path: str, rows: int, seed: int = 42) -> None:
+    """Génère un export CSV synthétique au format Zabbix"""
+    rng = random.Random(seed)
+    hosts = [f"srv{i:03d}.site{i % 7}.example.fr" for i in range(400)]
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(["Sévérité", "Temps", "État", "Hôte", "Problème", "Durée", "Acquitté", "Tags"])
+        for _ in range(rows):
+            temps = (f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.choice([2023, 2024])} "
+                     f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}")
+            duree = rng.choice([f"{rng.randint(1, 59)}m", f"{rng.randint(1, 23)}h {rng.randint(0, 59)}m",
+                                f"{rng.randint(1, 9)}j {rng.randint(0, 23)}h {rng.randint(0, 59)}m"])
+            probleme = (f"Alerte {rng.choice(TITRES)}: seuil dépassé\n"
+                        f"Condition of alarm: valeur > {rng.randint(50, 99)}\n"
+                        f"Action: Contacter l'astreinte {rng.choice(TEAMS)}\n"
+                        f"Impact: {rng.choice(['Fort', 'Moyen', 'Faible'])}")
+            tags = (f"hostname: {rng.choice(hosts)}, team: {rng.choice(TEAMS)}, "
+                    f"namespace: {rng.choice(NAMESPACES)}")
+            writer.writerow([rng.choice(SEVERITES), temps, rng.choice(ETATS), "alertmanager",
+                             probleme, duree, rng.choice(["Oui", "Non"]), tags])
+
+
+def legacy_filter_data(data: List[Dict[str, Any]], args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Implémentation historique de filter_data (une liste par critère), pour comparaison"""
+    filtered = data
+    for arg_name, (field, partial) in zbx.SIMPLE_FILTERS.items():
+        value = getattr(args, arg_name, None)
+        if value:
+            if partial:
+                filtered = [row for row in filtered if value.lower() in row.get(field, '').lower()]
+            else:
+                filtered = [row for row in filtered if value.lower() == row.get(field, '').lower()]
+    if args.tag:
+        key, value = args.tag.split('=') if '=' in args.tag else (args.tag, None)
+        filtered = [row for row in filtered if key in row.get('Tags_parsed', {}) and
+                    (value is None or row['Tags_parsed'][key] == value)]
+    if args.texte:
+        filtered = [row for row in filtered if args.texte.lower() in row.get('Problème', '').lower()]
+    if args.date_debut:
+        date_debut = datetime.strptime(args.date_debut, '%d/%m/%Y')
+        filtered = [row for row in filtered
+                    if datetime.strptime(row.get('Temps', '').split()[0], '%d/%m/%Y') >= date_debut]
+    if args.date_fin:
+        date_fin = datetime.strptime(args.date_fin, '%d/%m/%Y')
+        filtered = [row for row in filtered
+                    if datetime.strptime(row.get('Temps', '').split()[0], '%d/%m/%Y') <= date_fin]
+    for filter_type, value in [('min', args.duree_min), ('max', args.duree_max)]:
+        if value:
+            minutes = zbx.parse_duration_to_minutes(value)
+            if filter_type == 'min':
+                filtered = [row for row in filtered if zbx.parse_duration_to_minutes(row.get('Durée', '0m')) >= minutes]
+            else:
+                filtered = [row for row in filtered if zbx.parse_duration_to_minutes(row.get('Durée', '0m')) <= minutes]
+    return filtered
+
+
+def legacy_parse_tags(tags_str: str) -> Dict[str, str]:
+    """Implémentation historique de parse_tags (motif recompilé à chaque appel)"""
+    if not tags_str:
+        return {}
+    matches = re.findall(r'(\w+):\s*([^,]+?)(?:,|$)', tags_str)
+    return {key.strip(): value.strip() for key, value in matches}
+
+
+def legacy_parse_problem(problem_str: str) -> Dict[str, str]:
+    """Implémentation historique de parse_problem (un motif construit par champ et par appel)"""
+    result = {'titre': '', 'condition': '', 'action': '', 'impact': ''}
+    if not problem_str:
+        return result
+    match = re.match(r'\s*Alerte\s+([^:]+)\s*:', problem_str)
+    if match:
+        result['titre'] = match.group(1).strip()
+    for field in ['Condition of alarm', 'Action', 'Impact']:
+        match = re.search(f'{field}:\\s*([^\\n]+)', problem_str)
+        if match:
+            result[field.lower().replace(' of alarm', '')] = match.group(1).strip()
+    return result
+
+
+def legacy_group_counts(data: Any, group_by: str) -> Dict[Any, int]:
+    """Implémentation historique de group_counts: un parcours de la colonne du critère par appel"""
+    if group_by == 'type':
+        field = 'Problème'
+        keys = [parsed['titre'] or 'Inconnu' for parsed in data.problem_parsed]
+    elif group_by in zbx.GROUP_FIELDS and data.has_field(zbx.GROUP_FIELDS[group_by][0]):
+        field = zbx.GROUP_FIELDS[group_by][0]
+        keys = data.columns[field].values
+    else:
+        default = zbx.GROUP_FIELDS[group_by][1] if group_by in zbx.GROUP_FIELDS else 'Autre'
+        return {default: len(data)}
+
+    codes = data.columns[field].codes
+    index = data.indexes.get(field)
+    if index is not None and not data.is_view():
+        code_counts = {code: index.count(code) for code in range(len(keys)) if index.count(code)}
+    elif index is not None and data.selection is not None and len(keys) <= 64:
+        code_counts = {}
+        for code in range(len(keys)):
+            matched = data.selection & index.bitmap(code)
+            if matched:
+                code_counts[code] = (popcount(matched), (matched & -matched).bit_length())
+        code_counts = {code: count for code, (count, _) in
+                       sorted(code_counts.items(), key=lambda item: item[1][1])}
+    elif data.row_ids() == range(len(codes)):
+        code_counts = Counter(codes)
+    else:
+        code_counts = Counter(map(codes.__getitem__, data.row_ids()))
+
+    counts = defaultdict(int)
+    for code, count in code_counts.items():
+        counts[keys[code]] += count
+    return counts
+
+
+def legacy_stats(data: Any) -> Any:
+    """Calculs historiques de show_stats: un comptage par critère et deux tris complets"""
+    counts = {group_by: legacy_group_counts(data, group_by) for group_by in zbx.STATS_GROUPS}
+    epoch, minutes = data.numeric['Temps_epoch'], data.numeric['Durée_minutes']
+    oldest = sorted(data.row_ids(), key=lambda i: -zbx.MISSING if epoch[i] == zbx.MISSING else epoch[i])
+    longest = sorted(data.row_ids(), key=minutes.__getitem__, reverse=True)
+    return counts, oldest[:5], longest[:5]
+
+
+def timed(label: str, func: Callable[[], Any], repeat: int = 3) -> Any:
+    """Exécute func plusieurs fois et affiche le meilleur temps
+
+    Comme avec timeit, le ramasse-miettes est suspendu pendant les mesures.
+    """
+    best, result = None, None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {label:40} {best * 1000:10.1f} ms")
+    return best, result
+
+
+def bench_filters(path: str) -> None:
+    """Compare filter_data à l'implémentation historique avec les 13 filtres actifs"""
+    table = zbx.read_csv_file(path, use_cache=False)
+    records = table.to_records()
+    args = argparse.Namespace(
+        severite='Moyen', hote='alert', hostname='srv', hostname_short='srv1', team='mcx',
+        namespace='prod', etat='PROBLÈME', tag='team', texte='alerte', date_debut='01/03/2023',
+        date_fin='30/11/2024', duree_min='10m', duree_max='5j'
+    )
+    print(f"Filtres ({len(table)} lignes, 13 critères actifs):")
+    legacy_time, expected = timed("historique (liste de dictionnaires)", lambda: legacy_filter_data(records, args))
+    compiled_time, result = timed("filter_data (critères compilés)", lambda: zbx.filter_data(table, args))
+    assert result.to_records() == expected, "résultats différents"
+    print(f"  {len(result)} lignes retenues, accélération x{legacy_time / compiled_time:.1f}")
+
+
+def bench_indexes(path: str) -> None:
+    """Filtres d'égalité et comptages servis par les index inversés"""
+    table = zbx.read_csv_file(path, use_cache=False)
+    unindexed = zbx.read_csv_file(path, use_cache=False)
+    unindexed.indexes.clear()
+    args = argparse.Namespace(
+        severite='Moyen', hote='', hostname='', hostname_short='', team='mcx', namespace='prod',
+        etat='PROBLÈME', tag='', texte='', date_debut='', date_fin='', duree_min='', duree_max=''
+    )
+    print(f"Index ({len(table)} lignes, 4 égalités):")
+    timed("construction des index", lambda: table.build_indexes(zbx.INDEXED_FIELDS), repeat=1)
+    timed("filter_data sans index", lambda: zbx.filter_data(unindexed, args))
+    _, result = timed("filter_data avec index", lambda: zbx.filter_data(table, args))
+    timed("nombre de lignes (popcount)", lambda: zbx.popcount(result.selection))
+    timed("group_counts severite (table entière)", lambda: zbx.group_counts(table, 'severite'))
+    timed("group_counts team (vue filtrée)", lambda: zbx.group_counts(result, 'team'))
+    assert list(result.row_ids()) == list(zbx.filter_data(unindexed, args).row_ids()), "résultats différents"
+
+
+def bench_ngrams(path: str) -> None:
+    """Recherches partielles (texte, hostname) avec et sans index de trigrammes"""
+    table = zbx.read_csv_file(path, use_cache=False)
+    empty = dict(severite='', hote='', hostname='', hostname_short='', team='', namespace='', etat='',
+                 tag='', date_debut='', date_fin='', duree_min='', duree_max='')
+    searches = {
+        'texte': argparse.Namespace(**dict(empty, texte='valeur > 97')),
+        'hostname': argparse.Namespace(**dict(empty, texte='', hostname='srv12')),
+        'texte + hostname': argparse.Namespace(**dict(empty, texte='astreinte dba', hostname='srv12')),
+    }
+    print(f"Trigrammes ({len(table)} lignes):")
+    timed("construction des index", lambda: (table.build_indexes(zbx.NGRAM_FIELDS),
+                                             table.build_ngram_indexes(zbx.NGRAM_FIELDS)), repeat=1)
+    for name, args in searches.items():
+        indexed = table.ngrams.copy()
+        table.ngrams.clear()
+        _, expected = timed(f"{name} sans index", lambda: zbx.filter_data(table, args))
+        table.ngrams.update(indexed)
+        _, result = timed(f"{name} avec index", lambda: zbx.filter_data(table, args))
+        assert list(result.row_ids()) == list(expected.row_ids()), "résultats différents"
+
+
+def bench_cache(path: str) -> None:
+    """Chargement à froid (parsing du CSV) et à chaud (cache binaire projeté en mémoire)"""
+    cache_dir = tempfile.mkdtemp()
+    table_cache.CACHE_DIR = cache_dir
+    try:
+        print(f"Cache ({os.path.getsize(path) // 1024} Ko de CSV):")
+        _, expected = timed("lecture sans cache", lambda: zbx.read_csv_file(path, use_cache=False), repeat=1)
+        timed("lecture et écriture du cache", lambda: zbx.read_csv_file(path), repeat=1)
+        _, result = timed("lecture depuis le cache", lambda: zbx.read_csv_file(path))
+        timed("comptage par sévérité depuis le cache",
+              lambda: zbx.group_counts(zbx.read_csv_file(path), 'severite'))
+        assert result.to_records() == expected.to_records(), "résultats différents"
+    finally:
+        for name in os.listdir(cache_dir):
+            os.remove(os.path.join(cache_dir, name))
+        os.rmdir(cache_dir)
+
+
+def bench_parallel(path: str) -> None:
+    """Parsing séquentiel et parallèle du CSV, pour 2 processus et plus"""
+    print(f"Parsing parallèle ({os.cpu_count()} processeurs):")
+    _, expected = timed("1 processus", lambda: zbx.read_csv_file(path, use_cache=False), repeat=1)
+    jobs = 2
+    while jobs <= max(2, os.cpu_count() or 1):
+        _, result = timed(f"{jobs} processus", lambda: zbx.read_csv_parallel(path, jobs), repeat=1)
+        assert result.to_records() == expected.to_records(), "résultats différents"
+        jobs *= 2
+
+
+def bench_parsing(path: str) -> None:
+    """Coût par ligne du parsing des champs Tags et Problème"""
+    with open(path, 'r', encoding='utf-8') as f:
+        rows = [(row.get('Tags', ''), row.get('Problème', '')) for row in csv.DictReader(f)]
+
+    def parse_all(parse_tags: Callable[[str], Dict[str, str]],
+                  parse_problem: Callable[[str], Dict[str, str]]) -> List[Any]:
+        return [(parse_tags(tags), parse_problem(problem)) for tags, problem in rows]
+
+    def parse_cold() -> List[Any]:
+        zbx._parse_tags.cache_clear()
+        zbx._parse_problem.cache_clear()
+        return parse_all(zbx.parse_tags, zbx.parse_problem)
+
+    print(f"Parsing Tags et Problème ({len(rows)} lignes, par ligne):")
+    legacy_time, expected = timed("historique", lambda: parse_all(legacy_parse_tags, legacy_parse_problem), repeat=1)
+    # Sans mémorisation: coût de la découpe seule, comme pour des valeurs toutes distinctes
+    scan_time, result = timed("découpe, sans mémorisation",
+                              lambda: parse_all(zbx._parse_tags.__wrapped__, zbx._parse_problem.__wrapped__),
+                              repeat=1)
+    assert result == expected, "résultats différents"
+    cold_time, result = timed("découpe, cache vide", parse_cold, repeat=1)
+    assert result == expected, "résultats différents"
+    warm_time, result = timed("découpe, cache rempli",
+                              lambda: parse_all(zbx.parse_tags, zbx.parse_problem), repeat=1)
+    assert result == expected, "résultats différents"
+    timings = [("historique", legacy_time), ("sans mémorisation", scan_time),
+               ("cache vide", cold_time), ("cache rempli", warm_time)]
+    for label, elapsed in timings:
+        print(f"  {label:40} {elapsed / len(rows) * 1e9:10.0f} ns/ligne")
+    print(f"  accélération x{legacy_time / scan_time:.1f} (sans mémorisation), x{legacy_time / cold_time:.1f} "
+          f"(cache vide), x{legacy_time / warm_time:.1f} (cache rempli)")
+
+    # Valeurs toutes distinctes (un tag et une ligne propres à chaque alerte): la mémorisation
+    # ne sert à rien, le gain est celui de la découpe, diminué du coût du cache
+    distinct = [(f"{tags}, ligne: {i}", f"{problem}\nLigne {i}") for i, (tags, problem) in enumerate(rows)]
+    print(f"Parsing de valeurs toutes distinctes ({len(distinct)} lignes, par ligne):")
+    legacy_time, expected = timed("historique", lambda: [(legacy_parse_tags(tags), legacy_parse_problem(problem))
+                                                         for tags, problem in distinct], repeat=3)
+
+    def parse_distinct() -> List[Any]:
+        zbx._parse_tags.cache_clear()
+        zbx._parse_problem.cache_clear()
+        return [(zbx.parse_tags(tags), zbx.parse_problem(problem)) for tags, problem in distinct]
+
+    distinct_time, result = timed("découpe mémorisée", parse_distinct, repeat=3)
+    assert result == expected, "résultats différents"
+    print(f"  {legacy_time / len(rows) * 1e9:.0f} -> {distinct_time / len(rows) * 1e9:.0f} ns/ligne, "
+          f"accélération x{legacy_time / distinct_time:.1f}")
+
+
+def bench_stats(path: str) -> None:
+    """Calculs de --stats: comptages par critère et top 5, sur la table entière et sur une vue"""
+    table = zbx.read_csv_file(path, use_cache=False)
+    view = table.take(list(range(0, len(table), 3)))
+    # Vues filtrées, comme celles de l'interface web: par les index, puis par parcours des lignes
+    indexed = zbx.filter_data(table, zbx.FilterSpec.from_mapping({'etat': 'PROBLÈME'}))
+    scanned = zbx.filter_data(table, zbx.FilterSpec.from_mapping({'duree_min': '1h'}))
+
+    def stats(data: Any) -> Any:
+        return (zbx.multi_group_counts(data, zbx.STATS_GROUPS), zbx.top_rows(data, 'Temps_epoch', 5),
+                zbx.top_rows(data, 'Durée_minutes', 5, largest=True))
+
+    for label, data in [("table entière", table), ("vue d'un tiers des lignes", view),
+                        ("filtre --etat, par index", indexed), ("filtre --duree-min, par parcours", scanned)]:
+        def fresh(data: Any = data, selection: Optional[int] = data.selection) -> Any:
+            # Vue neuve à chaque mesure: le bitmap calculé au premier comptage n'est pas réutilisé
+            return data.take(data.row_ids(), selection) if data.is_view() else data
+
+        print(f"Statistiques ({label}, {len(data)} lignes):")
+        _, expected = timed("historique (8 comptages, 2 tris)", lambda: legacy_stats(fresh()))
+        _, result = timed("comptages par colonne et tas bornés", lambda: stats(fresh()))
+        assert result == expected, "résultats différents"
+
+
+BENCHMARKS = {
+    'filters': bench_filters,
+    'indexes': bench_indexes,
+    'ngrams': bench_ngrams,
+    'parsing': bench_parsing,
+    'cache': bench_cache,
+    'parallel': bench_parallel,
+    'stats': bench_stats,
+}
+
+
+def main() -> None:
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Benchmarks RRF STAT')
+    parser.add_argument('benchmarks', nargs='*',
+                        help=f"Benchmarks à exécuter parmi {', '.join(BENCHMARKS)} (défaut: tous)")
+    parser.add_argument('-n', '--rows', type=int, default=200000, help='Nombre de lignes générées')
+    parser.add_argument('-f', '--fichier', help='Export existant à utiliser au lieu de le générer')
+    args = parser.parse_args()
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"benchmark inconnu: {', '.join(unknown)}")
+
+    path = args.fichier
+    if not path:
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        print(f"Génération de {args.rows} alertes dans {path}...")
+        generate_export(path, args.rows)
+
+    try:
+        for name in args.benchmarks or BENCHMARKS:
+            BENCHMARKS[name](path)
+    finally:
+        if not args.fichier:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
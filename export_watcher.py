@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Surveillance des répertoires d'exports: liste des fichiers en mémoire et
+signalement des exports déposés
+"""
+
+import os
+import select
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Callable, Sequence, Tuple
+
+# Verrou entre processus, optionnel (absent sous Windows)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# inotify via la libc (Linux); à défaut les répertoires sont parcourus périodiquement
+try:
+    import ctypes
+    import ctypes.util
+    _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    _inotify_init1 = _libc.inotify_init1
+    _inotify_add_watch = _libc.inotify_add_watch
+    _inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+except (OSError, AttributeError):
+    _inotify_init1 = _inotify_add_watch = None
+
+
+# Événements inotify utilisés
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+
+# En-tête d'un événement: wd, mask, cookie, longueur du nom
+EVENT_HEADER = struct.Struct('iIII')
+
+# Intervalle du parcours périodique, et délai sans modification avant de signaler un export
+POLL_INTERVAL = 2.0
+SETTLE_DELAY = 1.0
+
+SUFFIX = '.csv'
+
+# (taille, date de modification) d'un fichier
+Stamp = Tuple[int, int]
+
+
+class ExportWatcher:
+    """Liste des exports CSV de plusieurs répertoires, tenue à jour par un thread
+
+    Sous Linux, les répertoires sont surveillés par inotify; ailleurs, ou si
+    inotify n'est pas disponible, ils sont parcourus toutes les
+    poll_interval secondes. Un fichier écrit ou déplacé dans un répertoire
+    est signalé à on_landed(chemin) une fois resté inchangé settle_delay
+    secondes, ce qui écarte les exports en cours d'écriture.
+    Avec lock_path, seul le processus qui détient le verrou reçoit les
+    signalements (serveur à plusieurs processus); tous tiennent leur liste.
+    """
+
+    def __init__(self, directories: Sequence[str], on_landed: Callable[[str], None],
+                 lock_path: Optional[str] = None, poll_interval: float = POLL_INTERVAL,
+                 settle_delay: float = SETTLE_DELAY) -> None:
+        self.directories = list(directories)
+        self.on_landed = on_landed
+        self.lock_path = lock_path
+        self.poll_interval = poll_interval
+        self.settle_delay = settle_delay
+        # 'inotify' ou 'poll' une fois démarré
+        self.mode: Optional[str] = None
+        self._files: Dict[str, Stamp] = {}
+        # Fichiers modifiés en attente de signalement: chemin -> (empreinte, date du dernier changement)
+        self._pending: Dict[str, Tuple[Optional[Stamp], float]] = {}
+        self._mutex = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_file = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Démarre la surveillance (sans effet si elle est déjà démarrée dans ce processus)"""
+        with self._mutex:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='export-watcher', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Arrête la surveillance"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def listing(self) -> List[str]:
+        """Exports présents, répertoire par répertoire puis par nom"""
+        if self._thread is None or not self._thread.is_alive():
+            self._scan()
+        with self._mutex:
+            files = list(self._files)
+        order = {directory: position for position, directory in enumerate(self.directories)}
+        return sorted(files, key=lambda path: (order.get(os.path.dirname(path) or '.', len(order)), path))
+
+    def _run(self) -> None:
+        self._scan()
+        if not self._watch_inotify():
+            self._watch_poll()
+
+    def _path(self, directory: str, name: str) -> str:
+        return os.path.normpath(os.path.join(directory, name))
+
+    def _stamp(self, path: str) -> Optional[Stamp]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _scan(self) -> Dict[str, Stamp]:
+        """Parcourt les répertoires et remplace la liste; retourne les fichiers trouvés"""
+        files: Dict[str, Stamp] = {}
+        for directory in self.directories:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.endswith(SUFFIX):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files[self._path(directory, entry.name)] = (stat.st_size, stat.st_mtime_ns)
+        with self._mutex:
+            self._files = files
+        return files
+
+    def _touched(self, path: str, stamp: Optional[Stamp]) -> None:
+        """Note une modification: le fichier sera signalé s'il ne change plus d'ici settle_delay"""
+        with self._mutex:
+            if stamp is None:
+                self._files.pop(path, None)
+            else:
+                self._files[path] = stamp
+            self._pending[path] = (stamp, time.monotonic())
+
+    def _flush(self) -> None:
+        """Signale les fichiers modifiés restés stables depuis settle_delay"""
+        now = time.monotonic()
+        with self._mutex:
+            settled = [path for path, (_, changed) in self._pending.items() if now - changed >= self.settle_delay]
+        for path in settled:
+            stamp = self._stamp(path)
+            with self._mutex:
+                previous, _ = self._pending.pop(path)
+                if stamp is not None and stamp != previous:
+                    # Encore modifié depuis le dernier événement: nouvelle attente
+                    self._files[path] = stamp
+                    self._pending[path] = (stamp, now)
+                    continue
+            if stamp is not None and self._owns_lock():
+                self.on_landed(path)
+
+    def _owns_lock(self) -> bool:
+        """Prend le verrou des signalements s'il est libre (il est gardé jusqu'à la fin du processus)"""
+        if self._lock_file is not None or self.lock_path is None or fcntl is None:
+            return True
+        lock_file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _watch_poll(self) -> None:
+        """Parcours périodique: un fichier nouveau ou dont l'empreinte change est en attente"""
+        self.mode = 'poll'
+        known = dict(self._files)
+        while not self._stopped.wait(self.poll_interval):
+            files = self._scan()
+            for path, stamp in files.items():
+                if known.get(path) != stamp:
+                    self._touched(path, stamp)
+            for path in known.keys() - files.keys():
+                with self._mutex:
+                    self._pending.pop(path, None)
+            known = files
+            self._flush()
+
+    def _watch_inotify(self) -> bool:
+        """Boucle inotify; retourne False si inotify est indisponible ou si un répertoire disparaît"""
+        if _inotify_init1 is None:
+            return False
+        fd = _inotify_init1(IN_CLOEXEC)
+        if fd < 0:
+            return False
+        try:
+            directories = {}
+            for directory in self.directories:
+                wd = _inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK)
+                if wd < 0:
+                    return False
+                directories[wd] = directory
+            self.mode = 'inotify'
+            while not self._stopped.is_set():
+                timeout = self.settle_delay if self._pending else self.poll_interval
+                if select.select([fd], [], [], timeout)[0]:
+                    if not self._read_events(fd, directories):
+                        return False
+                self._flush()
+            return True
+        finally:
+            os.close(fd)
+
+    def _read_events(self, fd: int, directories: Dict[int, str]) -> bool:
+        buffer = os.read(fd, 64 * 1024)
+        position = 0
+        while position < len(buffer):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, position)
+            name = buffer[position + EVENT_HEADER.size:position + EVENT_HEADER.size + length].rstrip(b'\0')
+            position += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                self._scan()
+            elif mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                return False
+            elif name.endswith(os.fsencode(SUFFIX)) and wd in directories:
+                path = self._path(directories[wd], os.fsdecode(name))
+                if mask & (IN_DELETE | IN_MOVED_FROM):
+                    with self._mutex:
+                        self._files.pop(path, None)
+                        self._pending.pop(path, None)
+                else:
+                    self._touched(path, self._stamp(path))
+        return True
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Chargements d'exports en arrière-plan pour l'interface web
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable, Iterator, Set
+
+# Verrou entre processus, optionnel (absent sous Windows)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# États d'un chargement
+PENDING = 'en_attente'
+RUNNING = 'en_cours'
+DONE = 'termine'
+FAILED = 'erreur'
+
+# Intervalle minimal entre deux écritures de l'état d'un chargement en cours
+WRITE_INTERVAL = 0.5
+
+
+class LoadJob:
+    """Chargement d'un export, avec sa progression (lignes, octets lus, débit)"""
+
+    def __init__(self, source: str, total_bytes: int) -> None:
+        self.id = uuid.uuid4().hex
+        self.source = source
+        self.total_bytes = total_bytes
+        self.state = PENDING
+        self.rows = 0
+        self.bytes_read = 0
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.error: Optional[str] = None
+        self.generation: Optional[int] = None
+
+    def status(self) -> Dict[str, Any]:
+        """État du chargement, sérialisable en JSON"""
+        elapsed = ((self.finished or time.time()) - self.started) if self.started else 0.0
+        return {
+            'job': self.id,
+            'source': self.source,
+            'state': self.state,
+            'rows': self.rows,
+            'bytes_read': self.bytes_read,
+            'total_bytes': self.total_bytes,
+            'progress': min(self.bytes_read / self.total_bytes, 1.0) if self.total_bytes else None,
+            'elapsed': round(elapsed, 3),
+            'rows_per_second': round(self.rows / elapsed) if elapsed else 0,
+            'bytes_per_second': round(self.bytes_read / elapsed) if elapsed else 0,
+            'generation': self.generation,
+            'error': self.error,
+        }
+
+
+class LoadJobs:
+    """Chargements exécutés un à un par un thread dédié
+
+    La requête qui lance un chargement rend la main aussitôt; la table en
+    cours de service reste utilisée jusqu'à la publication de la nouvelle.
+    Un flux reçu par une requête est quant à lui parsé par run, dans le
+    thread de la requête, avec le même suivi.
+    L'état de chaque chargement est écrit dans directory, de sorte que tous
+    les processus du serveur puissent répondre sur sa progression.
+
+    Un chargement qui écrit lui-même un export (copie d'un envoi) le réserve
+    avec claim jusqu'à sa publication; claimed permet aux autres chargements,
+    de ce processus ou d'un autre, de ne pas le parser une seconde fois.
+    """
+
+    def __init__(self, directory: str, max_jobs: int = 32) -> None:
+        self.directory = directory
+        self.max_jobs = max_jobs
+        self._jobs: Dict[str, LoadJob] = {}
+        self._written: Dict[str, float] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='load')
+        # Exports réservés par les chargements de ce processus
+        self._claims: Set[str] = set()
+        self._claims_lock = threading.Lock()
+
+    def start(self, source: str, load: Callable[[LoadJob], Optional[int]],
+              total_bytes: Optional[int] = None) -> LoadJob:
+        """Programme le chargement de source; load(job) met à jour la progression
+        et retourne la génération publiée. total_bytes vaut par défaut la taille de source."""
+        if total_bytes is None:
+            try:
+                total_bytes = os.path.getsize(source)
+            except OSError:
+                total_bytes = 0
+        job = self._register(source, total_bytes)
+        self._executor.submit(self._run, job, load)
+        return job
+
+    def run(self, source: str, total_bytes: int, load: Callable[[LoadJob], Optional[int]]) -> LoadJob:
+        """Exécute un chargement dans le thread appelant (flux reçu par une requête), avec le même suivi"""
+        job = self._register(source, total_bytes)
+        self._run(job, load)
+        return job
+
+    def update(self, job: LoadJob, rows: int, bytes_read: int) -> None:
+        """Suivi de progression passé au parsing"""
+        job.rows, job.bytes_read = rows, bytes_read
+        if time.time() - self._written.get(job.id, 0.0) >= WRITE_INTERVAL:
+            self._write(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """État d'un chargement, lancé par ce processus ou par un autre"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.status()
+        try:
+            with open(self._path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @contextlib.contextmanager
+    def claim(self, path: str) -> Iterator[None]:
+        """Réserve l'export path le temps du bloc (verrou de fichier partagé par les processus)"""
+        path = os.path.abspath(path)
+        with self._claims_lock:
+            self._claims.add(path)
+        lock_file = None
+        try:
+            if fcntl is not None:
+                os.makedirs(self.directory, exist_ok=True)
+                lock_file = open(self._claim_path(path), 'a')
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+        finally:
+            if lock_file is not None:
+                lock_file.close()
+            with self._claims_lock:
+                self._claims.discard(path)
+
+    def claimed(self, path: str) -> bool:
+        """Indique si l'export path est réservé par un chargement en cours, dans un processus quelconque"""
+        path = os.path.abspath(path)
+        with self._claims_lock:
+            if path in self._claims:
+                return True
+        if fcntl is None:
+            return False
+        try:
+            with open(self._claim_path(path), 'r') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except FileNotFoundError:
+            return False
+        except OSError:
+            return True
+        return False
+
+    def _claim_path(self, path: str) -> str:
+        # Fichier de verrou propre à chaque export, conservé d'une réservation à l'autre
+        return os.path.join(self.directory, hashlib.sha1(path.encode('utf-8')).hexdigest()[:20] + '.lock')
+
+    def _register(self, source: str, total_bytes: int) -> LoadJob:
+        job = LoadJob(source, total_bytes)
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.max_jobs:
+            del self._jobs[next(iter(self._jobs))]
+        self._write(job)
+        return job
+
+    def _run(self, job: LoadJob, load: Callable[[LoadJob], Optional[int]]) -> None:
+        job.state, job.started = RUNNING, time.time()
+        self._write(job)
+        try:
+            job.generation = load(job)
+            job.state = DONE
+        except Exception as e:
+            job.state, job.error = FAILED, str(e)
+        job.finished = time.time()
+        self._write(job)
+
+    def _path(self, job_id: str) -> str:
+        # L'identifiant vient de l'URL: seuls les caractères hexadécimaux sont conservés
+        return os.path.join(self.directory, ''.join(c for c in job_id if c in '0123456789abcdef') + '.json')
+
+    def _write(self, job: LoadJob) -> None:
+        """Écrit l'état du chargement de façon atomique, et supprime les plus anciens"""
+        self._written[job.id] = time.time()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(job.id)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(job.status(), f, ensure_ascii=False)
+            os.replace(temp_path, path)
+            if job.state in (DONE, FAILED):
+                self._written.pop(job.id, None)
+                self._prune()
+        except OSError:
+            return
+
+    def _prune(self) -> None:
+        names = [name for name in os.listdir(self.directory) if name.endswith('.json')]
+        if len(names) <= self.max_jobs:
+            return
+        paths = sorted((os.path.join(self.directory, name) for name in names), key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_jobs]:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Jeux de données formés de plusieurs exports, une partition par fichier
+"""
+
+import glob
+import os
+import threading
+from typing import Dict, List, Any, Optional, Callable, Iterable, Sequence, Tuple
+
+from alert_table import AlertTable, MISSING
+from table_cache import source_signature, cached_summary
+
+
+# Champs dont les valeurs distinctes sont résumées pour chaque partition
+SUMMARY_FIELDS = ('Sévérité', 'État', 'team', 'namespace')
+
+
+def expand_sources(pattern: str) -> List[str]:
+    """Fichiers désignés par un chemin, un répertoire (ses *.csv) ou un motif glob, triés par nom
+
+    Un chemin sans correspondance est retourné tel quel, pour que son
+    absence soit signalée par la lecture.
+    """
+    if os.path.isdir(pattern):
+        return sorted(glob.glob(os.path.join(glob.escape(pattern), '*.csv')))
+    if glob.has_magic(pattern):
+        return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+    return [pattern]
+
+
+def is_multi_source(pattern: str) -> bool:
+    """Indique si le chemin désigne un ensemble d'exports (répertoire ou motif glob)"""
+    return os.path.isdir(pattern) or glob.has_magic(pattern)
+
+
+def table_summary(table: AlertTable) -> Dict[str, Any]:
+    """Résumé d'une table complète: colonnes, lignes, bornes de Temps et valeurs distinctes de SUMMARY_FIELDS"""
+    epochs = table.numeric.get('Temps_epoch', ())
+    readable = epochs if not table.count_missing('Temps_epoch') else list(filter(MISSING.__ne__, epochs))
+    return {
+        'fields': list(table.fieldnames),
+        'rows': len(table),
+        'temps_min': min(readable) if readable else None,
+        'temps_max': max(readable) if readable else None,
+        'values': {field: table.columns[field].values for field in SUMMARY_FIELDS if table.has_field(field)},
+    }
+
+
+class Partition:
+    """Export d'un jeu de données, chargé à la première utilisation
+
+    Le résumé est relu dans l'en-tête du cache de l'export quand il est à
+    jour, ce qui permet d'écarter la partition sans charger sa table. La
+    table n'est chargée qu'une fois, même si plusieurs threads la demandent
+    en même temps (serveur web).
+    """
+
+    def __init__(self, path: str, load: Callable[[str], AlertTable], use_cache: bool = True) -> None:
+        self.path = path
+        self._load = load
+        self._use_cache = use_cache
+        self._table: Optional[AlertTable] = None
+        self._summary: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._table is not None
+
+    @property
+    def table(self) -> AlertTable:
+        if self._table is None:
+            with self._lock:
+                if self._table is None:
+                    self._table = self._load(self.path)
+        return self._table
+
+    @property
+    def summary(self) -> Dict[str, Any]:
+        if self._summary is None:
+            self._summary = self._stored_summary()
+            if self._summary is None:
+                self._summary = table_summary(self.table)
+        return self._summary
+
+    @property
+    def rows(self) -> int:
+        """Nombre de lignes, lu dans le résumé enregistré plutôt que dans la table"""
+        if self._summary is None and self._table is not None:
+            self._summary = self._stored_summary()
+            if self._summary is None:
+                return len(self._table)
+        return self.summary['rows']
+
+    def _stored_summary(self) -> Optional[Dict[str, Any]]:
+        """Résumé lu dans l'en-tête du cache s'il est à jour, sinon None"""
+        if not self._use_cache or not os.path.exists(self.path):
+            return None
+        return cached_summary(self.path, source_signature(self.path))
+
+
+class PartitionedDataset:
+    """Union d'exports dans l'ordre de leurs noms, sans les charger tous
+
+    load(chemin) charge la table d'un export (avec son cache). Les
+    partitions sont chargées au fil des requêtes qui les concernent.
+    """
+
+    def __init__(self, paths: Sequence[str], load: Callable[[str], AlertTable], use_cache: bool = True,
+                 numeric: Optional[Dict[str, Tuple[str, Any, Callable[[Any], int]]]] = None) -> None:
+        self.partitions = [Partition(path, load, use_cache) for path in paths]
+        self.numeric = numeric
+
+    def __len__(self) -> int:
+        return sum(partition.rows for partition in self.partitions)
+
+    def select(self, may_match: Callable[[Dict[str, Any]], bool]) -> List[Partition]:
+        """Partitions dont le résumé n'exclut pas une correspondance"""
+        return [partition for partition in self.partitions if may_match(partition.summary)]
+
+    def union(self) -> AlertTable:
+        """Table de toutes les lignes du jeu de données"""
+        return union_tables([partition.table for partition in self.partitions])
+
+    def empty(self) -> AlertTable:
+        """Table sans ligne ayant les colonnes du jeu de données, construite sans charger de partition"""
+        return AlertTable(self.partitions[0].summary['fields'], self.numeric)
+
+
+def union_tables(tables: Iterable[AlertTable]) -> Optional[AlertTable]:
+    """Table complète des lignes visibles des tables, mises bout à bout
+
+    Les codes sont ceux qu'aurait donnés la lecture des exports concaténés.
+    Seules les vues partielles sont recopiées avant l'ajout. Retourne None
+    sans table.
+    """
+    result = None
+    for table in tables:
+        if table.row_ids() == range(table.size):
+            # Toutes les lignes, dans l'ordre: la table sous-jacente est ajoutée telle quelle
+            part = table.complete()
+        else:
+            part = table.gather(table.row_ids())
+        if result is None:
+            result = AlertTable(part.fieldnames, part.converters)
+        elif part.fieldnames != result.fieldnames:
+            raise ValueError(f"colonnes différentes d'un export à l'autre: {', '.join(part.fieldnames)}")
+        result.extend(part)
+    return result
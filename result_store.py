@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Stockage côté serveur des résultats affichés par l'interface web
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+
+def result_key(generation: int, kind: str, params: Dict[str, Any]) -> str:
+    """Clé d'un résultat: génération de l'export, type de résultat et paramètres normalisés
+
+    Les paramètres vides sont ignorés, de sorte que deux formulaires
+    équivalents partagent le même résultat.
+    """
+    normalized = {name: str(value) for name, value in params.items() if value is not None and str(value)}
+    payload = json.dumps([generation, kind, normalized], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class ResultStore:
+    """Cache LRU de résultats limité en octets, avec débordement optionnel sur disque
+
+    Les résultats sont des structures JSON (texte, colonnes et lignes du
+    tableau...). Ceux qui sortent de la mémoire sont écrits dans spill_dir,
+    lui-même limité à max_disk_bytes, et y sont relus au besoin.
+    Le cache est partagé par les threads du serveur: les entrées et les
+    compteurs ne sont modifiés que sous verrou, les lectures et écritures
+    sur disque se font hors verrou.
+    """
+
+    def __init__(self, max_bytes: int, spill_dir: Optional[str] = None, max_disk_bytes: int = 0) -> None:
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, Tuple[Any, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Optional[str]) -> Optional[Any]:
+        """Résultat associé à la clé, ou None s'il a été évincé"""
+        if not key:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        path = self._spill_path(key)
+        encoded = None
+        if path is not None:
+            try:
+                with open(path, 'rb') as f:
+                    encoded = f.read()
+                value = json.loads(encoded)
+            except (OSError, ValueError):
+                encoded = None
+        spilled: List[Tuple[str, Any, Optional[bytes]]] = []
+        with self._lock:
+            if encoded is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if len(encoded) <= self.max_bytes:
+                spilled = self._remember(key, value, len(encoded))
+        for args in spilled:
+            self._spill(*args)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        """Compteurs du cache"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'bytes': self.size}
+
+    def put(self, key: str, value: Any) -> None:
+        """Enregistre un résultat et évince les moins récemment utilisés au-delà de la limite"""
+        encoded = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        with self._lock:
+            spilled = self._remember(key, value, len(encoded), encoded)
+        for args in spilled:
+            self._spill(*args)
+
+    def _remember(self, key: str, value: Any, size: int,
+                  encoded: Optional[bytes] = None) -> List[Tuple[str, Any, Optional[bytes]]]:
+        """Ajoute une entrée (verrou détenu); retourne les résultats à écrire sur disque"""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= previous[1]
+        if size > self.max_bytes:
+            # Un résultat plus gros que la limite n'est conservé que sur disque
+            return [(key, value, encoded)]
+        self._entries[key] = (value, size)
+        self.size += size
+        spilled = []
+        while self.size > self.max_bytes:
+            evicted_key, (evicted, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+            spilled.append((evicted_key, evicted, None))
+        return spilled
+
+    def _spill_path(self, key: str) -> Optional[str]:
+        return os.path.join(self.spill_dir, f"{key}.json") if self.spill_dir else None
+
+    def _spill(self, key: str, value: Any, encoded: Optional[bytes] = None) -> None:
+        """Écrit un résultat évincé sur disque, puis applique la limite du répertoire"""
+        path = self._spill_path(key)
+        if path is None or not self.max_disk_bytes:
+            return
+        if encoded is None:
+            encoded = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        if len(encoded) > self.max_disk_bytes:
+            return
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            # Fichier temporaire propre au thread: deux requêtes peuvent écrire le même résultat
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(encoded)
+            os.replace(temp_path, path)
+        except OSError:
+            return
+        self._prune_spill()
+
+    def _prune_spill(self) -> None:
+        """Supprime les résultats les plus anciens du disque au-delà de max_disk_bytes"""
+        entries = []
+        for name in os.listdir(self.spill_dir):
+            if name.endswith('.json'):
+                path = os.path.join(self.spill_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
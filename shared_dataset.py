@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Jeu de données partagé entre les processus du serveur web
+"""
+
+import contextlib
+import json
+import os
+import threading
+from typing import Dict, List, Any, Optional, Callable, Iterator, Sequence, Tuple, Union
+
+from alert_table import AlertTable
+from partitions import PartitionedDataset
+
+# Verrou entre processus, optionnel (absent sous Windows)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+POINTER_NAME = 'current.json'
+# Fichier verrouillé pendant une publication, pour les processus qui publient en même temps
+LOCK_NAME = 'publish.lock'
+PREFIX = 'dataset-'
+SUFFIX = '.zbxt'
+
+
+class SharedDataset:
+    """Table publiée sur disque et projetée en mémoire par chaque processus
+
+    publish écrit la table dans un fichier binaire par génération, puis
+    remplace de façon atomique le fichier pointeur qui désigne la génération
+    courante. refresh, appelé avant chaque requête, ne fait qu'un stat du
+    pointeur: quand un autre processus a publié une nouvelle génération, le
+    fichier correspondant est projeté en mémoire à la place du précédent.
+    Les pages du fichier sont ainsi partagées par tous les processus.
+
+    publish_sources publie de même un jeu de données partitionné: le
+    pointeur ne désigne alors que ses exports, ouverts par open_sources dans
+    chaque processus et relus de leur cache au fil des requêtes.
+
+    prepare complète la table avant sa publication (index de trigrammes...):
+    ce qu'elle construit est enregistré avec la génération, si bien qu'un
+    processus qui en change n'a rien à reconstruire pendant une requête.
+    Un verrou garantit qu'une génération n'est projetée qu'une fois par
+    processus, quel que soit le nombre de requêtes qui la découvrent; le
+    choix de la génération publiée, son écriture et le remplacement du
+    pointeur se font en plus sous un verrou de fichier (flock), partagé par
+    tous les processus.
+    """
+
+    def __init__(self, directory: str,
+                 numeric: Optional[Dict[str, Tuple[str, Any, Callable[[Any], int]]]] = None,
+                 prepare: Optional[Callable[[AlertTable], None]] = None,
+                 open_sources: Optional[Callable[[List[str]], PartitionedDataset]] = None) -> None:
+        self.directory = directory
+        self.pointer_path = os.path.join(directory, POINTER_NAME)
+        self.numeric = numeric
+        # Traitement appliqué à la table avant son enregistrement (index publiés avec elle)
+        self.prepare = prepare
+        # Ouverture des exports d'un jeu de données partitionné publié par publish_sources
+        self.open_sources = open_sources
+        self.table: Optional[Union[AlertTable, PartitionedDataset]] = None
+        self.generation = 0
+        self.source: Optional[str] = None
+        # Signature (voir table_cache.source_signature) du fichier publié, si connue
+        self.signature: Optional[Dict[str, Any]] = None
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def publish(self, table: AlertTable, source: str, signature: Optional[Dict[str, Any]] = None) -> AlertTable:
+        """Publie la table comme nouvelle génération et retourne sa version projetée
+
+        signature identifie le contenu du fichier source, ce qui permet de ne
+        pas republier un export déjà servi.
+        """
+        if self.prepare:
+            self.prepare(table)
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, self._publishing():
+            generation = self._next_generation()
+            name = f"{PREFIX}{generation}{SUFFIX}"
+            table.save(os.path.join(self.directory, name), {'generation': generation, 'source': source})
+            self._replace_pointer({'generation': generation, 'file': name, 'source': source, 'rows': len(table),
+                                   'signature': signature})
+        self._remove_old_generations(generation)
+        return self.table
+
+    def publish_sources(self, paths: Sequence[str], source: str, rows: int) -> PartitionedDataset:
+        """Publie les exports d'un jeu de données partitionné comme nouvelle génération
+
+        Aucune table n'est écrite: chaque export doit déjà être dans le cache
+        des tables, d'où les processus le relisent à la première requête qui
+        le concerne. Retourne le jeu de données ouvert par open_sources.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, self._publishing():
+            generation = self._next_generation()
+            self._replace_pointer({'generation': generation, 'sources': list(paths), 'source': source,
+                                   'rows': rows, 'signature': None})
+        self._remove_old_generations(generation)
+        return self.table
+
+    def _next_generation(self) -> int:
+        """Numéro de la génération à publier (verrous détenus)"""
+        current = self._read_pointer()
+        return max(self.generation, current['generation'] if current else 0) + 1
+
+    def _replace_pointer(self, pointer: Dict[str, Any]) -> None:
+        """Remplace le pointeur de façon atomique et passe à la génération qu'il désigne (verrous détenus)"""
+        temp_path = f"{self.pointer_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(pointer, f, ensure_ascii=False)
+        os.replace(temp_path, self.pointer_path)
+        self._switch(pointer, self._pointer_stamp())
+
+    @contextlib.contextmanager
+    def _publishing(self) -> Iterator[None]:
+        """Verrou exclusif des publications, entre processus (sans effet sans fcntl)"""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, LOCK_NAME), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def refresh(self) -> Optional[Union[AlertTable, PartitionedDataset]]:
+        """Retourne la table (ou le jeu partitionné) de la génération courante, en la projetant si elle a changé"""
+        stamp = self._pointer_stamp()
+        if stamp is None or stamp == self._stamp:
+            return self.table
+        with self._lock:
+            # Une autre requête a pu projeter la génération pendant l'attente du verrou
+            if stamp == self._stamp:
+                return self.table
+            pointer = self._read_pointer()
+            if pointer and pointer['generation'] != self.generation:
+                try:
+                    self._switch(pointer, stamp)
+                except (OSError, ValueError):
+                    # Fichier en cours de remplacement: nouvel essai à la prochaine requête
+                    pass
+            else:
+                self._stamp = stamp
+        return self.table
+
+    def _switch(self, pointer: Dict[str, Any], stamp: Optional[Tuple[int, int]]) -> None:
+        """Projette la génération désignée par le pointeur, ou ouvre ses exports (verrou détenu)"""
+        if 'sources' in pointer:
+            if self.open_sources is None:
+                raise ValueError("jeu de données partitionné publié sans open_sources")
+            table = self.open_sources(pointer['sources'])
+        else:
+            table = AlertTable.load(os.path.join(self.directory, pointer['file']), self.numeric)
+        self.table, self.generation, self.source = table, pointer['generation'], pointer['source']
+        self.signature = pointer.get('signature')
+        self._stamp = stamp
+
+    def _pointer_stamp(self) -> Optional[Tuple[int, int]]:
+        """Identité du fichier pointeur: os.replace crée toujours un nouveau fichier"""
+        try:
+            stat = os.stat(self.pointer_path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _read_pointer(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.pointer_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _remove_old_generations(self, generation: int) -> None:
+        """Supprime les fichiers des générations antérieures à la précédente
+
+        La génération précédente est conservée pour les processus qui ne sont
+        pas encore passés à la nouvelle; les fichiers supprimés restent
+        lisibles par ceux qui les ont déjà projetés.
+        """
+        for name in os.listdir(self.directory):
+            if name.startswith(PREFIX) and name.endswith(SUFFIX):
+                try:
+                    if int(name[len(PREFIX):-len(SUFFIX)]) < generation - 1:
+                        os.remove(os.path.join(self.directory, name))
+                except (ValueError, OSError):
+                    continue
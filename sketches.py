@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Résumés de distributions fusionnables (DDSketch) pour les quantiles de durées
+"""
+
+import math
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence
+
+
+# Précision relative des quantiles restitués
+RELATIVE_ACCURACY = 0.01
+
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+
+# Case des valeurs nulles (plus petite clé d'un tableau 'i')
+ZERO_KEY = -2**31
+
+
+class DDSketch:
+    """Distribution approchée de valeurs positives ou nulles
+
+    Chaque valeur est comptée dans la case k telle que
+    GAMMA^(k-1) < valeur <= GAMMA^k, soit des cases de 2 % de large: un
+    quantile est restitué à RELATIVE_ACCURACY près quelle que soit la
+    distribution. Deux sketches se fusionnent en additionnant leurs cases;
+    la somme des valeurs est exacte.
+    """
+
+    __slots__ = ('bins', 'count', 'sum')
+
+    def __init__(self) -> None:
+        self.bins: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0
+
+    @staticmethod
+    def key(value: float) -> int:
+        """Case d'une valeur"""
+        if value <= 0:
+            return ZERO_KEY
+        return math.ceil(math.log(value) / _LOG_GAMMA)
+
+    @staticmethod
+    def value(key: int) -> float:
+        """Valeur représentative d'une case, à RELATIVE_ACCURACY près de toutes ses valeurs"""
+        if key == ZERO_KEY:
+            return 0.0
+        return 2 * GAMMA ** key / (GAMMA + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Compte count fois la valeur"""
+        self.add_key(self.key(value), count)
+        self.sum += value * count
+
+    def add_key(self, key: int, count: int) -> None:
+        """Compte count valeurs dans la case key (la somme est à ajouter à part)"""
+        self.bins[key] = self.bins.get(key, 0) + count
+        self.count += count
+
+    def merge(self, other: 'DDSketch') -> None:
+        """Ajoute les valeurs d'un autre sketch"""
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.count += other.count
+        self.sum += other.sum
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Valeur de rang q * (count - 1) parmi les valeurs triées, à RELATIVE_ACCURACY près"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return self.value(key)
+        return self.value(max(self.bins))
+
+    def histogram(self, edges: Sequence[float]) -> List[int]:
+        """Nombre de valeurs par classe: < edges[0], [edges[0], edges[1]), ..., >= edges[-1]
+
+        Les valeurs de la case d'une borne sont comptées au-dessus de celle-ci:
+        l'erreur porte au plus sur les valeurs à moins de 2 % sous la borne.
+        """
+        edge_keys = [self.key(edge) for edge in edges]
+        counts = [0] * (len(edges) + 1)
+        for key, count in self.bins.items():
+            counts[bisect_right(edge_keys, key)] += count
+        return counts
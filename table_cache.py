@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cache disque des exports parsés, au format binaire d'AlertTable
+"""
+
+import hashlib
+import os
+import sys
+import time
+from typing import BinaryIO, Dict, List, Any, Optional, Callable, Tuple
+
+from alert_table import AlertTable
+
+
+# Répertoire du cache, à côté du répertoire data de l'interface web
+CACHE_DIR = os.environ.get('RRF_CACHE_DIR', 'cache')
+
+# Limites d'éviction: taille totale du cache et âge du dernier accès
+CACHE_MAX_BYTES = int(os.environ.get('RRF_CACHE_MAX_MB', '2048')) * 1024 * 1024
+CACHE_MAX_AGE = int(os.environ.get('RRF_CACHE_MAX_DAYS', '30')) * 86400
+
+# À incrémenter quand le parsing des lignes change, pour invalider les caches existants
+CACHE_VERSION = 1
+
+# Taille des portions de début et de fin de fichier prises en compte dans l'empreinte
+HASH_SAMPLE = 1024 * 1024
+
+# Taille des blocs lus pour l'empreinte complète du contenu
+HASH_BLOCK = 4 * 1024 * 1024
+
+SUFFIX = '.zbxt'
+
+
+def source_signature(file_path: str) -> Dict[str, Any]:
+    """Clé de cache d'un export: chemin, taille, date de modification et empreinte du contenu
+
+    L'empreinte porte sur le début et la fin du fichier, ce qui suffit à
+    détecter une réécriture sans relire un export de plusieurs gigaoctets.
+    """
+    stat = os.stat(file_path)
+    with open(file_path, 'rb') as f:
+        digest = _content_digest(f, stat.st_size)
+    return {
+        'version': CACHE_VERSION,
+        'path': os.path.abspath(file_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'hash': digest,
+    }
+
+
+def _content_digest(f: BinaryIO, size: int) -> str:
+    """Empreinte des size premiers octets du fichier: taille, début et fin de cette portion"""
+    digest = hashlib.blake2b(str(size).encode('ascii'), digest_size=16)
+    f.seek(0)
+    digest.update(f.read(min(size, HASH_SAMPLE)))
+    if size > 2 * HASH_SAMPLE:
+        f.seek(size - HASH_SAMPLE)
+    digest.update(f.read(size - f.tell()))
+    return digest.hexdigest()
+
+
+def content_digest(file_path: str, size: int) -> str:
+    """Empreinte de la totalité des size premiers octets du fichier"""
+    with open(file_path, 'rb') as f:
+        return _full_digest(f, size)
+
+
+def _full_digest(f: BinaryIO, size: int) -> str:
+    digest = hashlib.blake2b(str(size).encode('ascii'), digest_size=16)
+    f.seek(0)
+    remaining = size
+    while remaining > 0:
+        block = f.read(min(remaining, HASH_BLOCK))
+        if not block:
+            break
+        digest.update(block)
+        remaining -= len(block)
+    return digest.hexdigest()
+
+
+def appended_since(file_path: str, meta: Dict[str, Any]) -> bool:
+    """Indique si le fichier n'a changé que par ajout de lignes depuis l'écriture d'un cache
+
+    Les meta['size'] premiers octets doivent avoir, en entier, l'empreinte
+    meta['content'] enregistrée avec le cache et se terminer par une fin de
+    ligne; ce qui suit ne contient alors que des enregistrements nouveaux.
+    L'empreinte échantillonnée de la signature ne suffit pas: une
+    modification en milieu de fichier lui échappe.
+    """
+    size, content = meta['size'], meta.get('content')
+    try:
+        with open(file_path, 'rb') as f:
+            if not size or not content or os.fstat(f.fileno()).st_size < size:
+                return False
+            f.seek(size - 1)
+            if f.read(1) != b'\n':
+                return False
+            return _full_digest(f, size) == content
+    except OSError:
+        return False
+
+
+def cache_path(file_path: str) -> str:
+    """Chemin du fichier de cache d'un export"""
+    name = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:20]
+    return os.path.join(CACHE_DIR, name + SUFFIX)
+
+
+def load_cached(file_path: str, signature: Dict[str, Any],
+                numeric: Optional[Dict[str, Tuple[str, Any, Callable[[Any], int]]]] = None) -> Optional[AlertTable]:
+    """Table en cache pour l'export, ou None si absente ou périmée"""
+    path = cache_path(file_path)
+    try:
+        if not _same_source(AlertTable.read_header(path).get('meta'), signature):
+            return None
+        table = AlertTable.load(path, numeric)
+        # La date de modification sert de date de dernier accès pour l'éviction
+        os.utime(path)
+    except (OSError, ValueError, KeyError):
+        return None
+    return table
+
+
+def cached_summary(file_path: str, signature: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Résumé enregistré avec la table en cache de l'export, lu sans charger la table
+
+    Les colonnes de la table (fields) sont reprises de l'en-tête.
+    """
+    try:
+        header = AlertTable.read_header(cache_path(file_path))
+    except (OSError, ValueError):
+        return None
+    meta = header.get('meta')
+    if not _same_source(meta, signature) or not meta.get('summary'):
+        return None
+    return dict(meta['summary'], fields=header['fieldnames'])
+
+
+def cached_ngrams(file_path: str, signature: Dict[str, Any]) -> List[str]:
+    """Champs indexés par trigrammes dans la table en cache de l'export ([] si le cache est absent ou périmé)"""
+    try:
+        header = AlertTable.read_header(cache_path(file_path))
+    except (OSError, ValueError):
+        return []
+    return header.get('ngrams', []) if _same_source(header.get('meta'), signature) else []
+
+
+def _same_source(meta: Optional[Dict[str, Any]], signature: Dict[str, Any]) -> bool:
+    """Indique si les métadonnées d'un cache ont été écrites pour cette signature"""
+    return bool(meta) and all(meta.get(key) == value for key, value in signature.items())
+
+
+def load_previous(file_path: str,
+                  numeric: Optional[Dict[str, Tuple[str, Any, Callable[[Any], int]]]] = None
+                  ) -> Optional[Tuple[AlertTable, Dict[str, Any]]]:
+    """Table en cache pour une version précédente de l'export, avec sa signature
+
+    Sert de point de départ aux rechargements incrémentaux; None si le cache
+    est absent ou a été écrit par une version différente du parsing.
+    """
+    path = cache_path(file_path)
+    try:
+        signature = AlertTable.read_header(path).get('meta') or {}
+        if signature.get('version') != CACHE_VERSION or signature.get('path') != os.path.abspath(file_path):
+            return None
+        return AlertTable.load(path, numeric), signature
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def store_cached(file_path: str, signature: Dict[str, Any], table: AlertTable,
+                 summary: Optional[Dict[str, Any]] = None, content: Optional[str] = None) -> None:
+    """Enregistre la table parsée de l'export, avec son résumé éventuel, puis applique les limites du cache
+
+    content est l'empreinte complète (content_digest) du fichier parsé, qui
+    permettra de reconnaître un simple ajout de lignes; elle est calculée
+    sur le fichier actuel si elle n'est pas fournie.
+    """
+    meta = dict(signature, summary=summary) if summary else dict(signature)
+    try:
+        meta['content'] = content or content_digest(file_path, signature['size'])
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        table.save(cache_path(file_path), meta)
+    except OSError as e:
+        print(f"Avertissement: impossible d'écrire le cache de {file_path}: {e}", file=sys.stderr)
+        return
+    prune_cache()
+
+
+def prune_cache(max_bytes: int = CACHE_MAX_BYTES, max_age: int = CACHE_MAX_AGE) -> None:
+    """Supprime les caches plus anciens que max_age, puis les moins récemment utilisés au-delà de max_bytes"""
+    try:
+        names = [name for name in os.listdir(CACHE_DIR) if name.endswith(SUFFIX)]
+    except OSError:
+        return
+    entries = []
+    for name in names:
+        path = os.path.join(CACHE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    now = time.time()
+    total = sum(size for _, size, _ in entries)
+    for mtime, size, path in sorted(entries):
+        if now - mtime <= max_age and total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Rechargements d'un export modifié depuis sa mise en cache
+
+Exécution: python -m pytest test_table_cache.py (ou python -m unittest test_table_cache)
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import parse_zbx_problems as zbx
+import table_cache
+from bench_zbx import generate_export
+
+
+class ReloadTest(unittest.TestCase):
+    """La table relue avec le cache doit être celle d'un parsing complet"""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.saved = table_cache.CACHE_DIR, table_cache.HASH_SAMPLE
+        table_cache.CACHE_DIR = os.path.join(self.directory, 'cache')
+        # Échantillons réduits: le milieu de l'export échappe à l'empreinte de la signature
+        table_cache.HASH_SAMPLE = 4096
+        self.path = os.path.join(self.directory, 'export.csv')
+        generate_export(self.path, 2000)
+        zbx.load_csv_table(self.path)
+
+    def tearDown(self) -> None:
+        table_cache.CACHE_DIR, table_cache.HASH_SAMPLE = self.saved
+        shutil.rmtree(self.directory)
+
+    def rewrite(self, content: bytes) -> None:
+        """Réécrit l'export avec une date de modification distincte de celle du cache"""
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        with open(self.path, 'wb') as f:
+            f.write(content)
+        os.utime(self.path, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+
+    def assert_reloaded(self) -> None:
+        expected = zbx.load_csv_table(self.path, use_cache=False).to_records()
+        self.assertEqual(zbx.load_csv_table(self.path).to_records(), expected)
+        # Le cache réenregistré est à jour
+        self.assertEqual(zbx.load_csv_table(self.path).to_records(), expected)
+
+    def test_same_length_edit(self) -> None:
+        with open(self.path, 'rb') as f:
+            content = f.read()
+        middle = content.index(b'"Non"', len(content) // 2)
+        self.rewrite(content[:middle] + b'"Oui"' + content[middle + 5:])
+        self.assertEqual(os.path.getsize(self.path), len(content))
+        self.assert_reloaded()
+
+    def test_same_content(self) -> None:
+        with open(self.path, 'rb') as f:
+            self.rewrite(f.read())
+        self.assert_reloaded()
+
+    def test_appended_rows(self) -> None:
+        with open(self.path, 'rb') as f:
+            content = f.read()
+        extra = os.path.join(self.directory, 'extra.csv')
+        generate_export(extra, 100, seed=7)
+        with open(extra, 'rb') as f:
+            rows = f.read().split(b'\r\n', 1)[1]
+        self.rewrite(content + rows)
+        self.assert_reloaded()
+
+    def test_edit_and_append(self) -> None:
+        with open(self.path, 'rb') as f:
+            content = f.read()
+        middle = content.index(b'"Oui"', len(content) // 2)
+        extra = os.path.join(self.directory, 'extra.csv')
+        generate_export(extra, 100, seed=7)
+        with open(extra, 'rb') as f:
+            rows = f.read().split(b'\r\n', 1)[1]
+        self.rewrite(content[:middle] + b'"Non"' + content[middle + 5:] + rows)
+        self.assert_reloaded()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Lecture des exports envoyés en flux à l'interface web (compressés ou non)
+"""
+
+import gzip
+import io
+from typing import BinaryIO, Optional
+
+# Décompression zstd optionnelle (pip install zstandard)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Suffixes et valeurs de Content-Encoding reconnus
+COMPRESSIONS = {
+    '.gz': 'gzip',
+    '.zst': 'zstd',
+    'gzip': 'gzip',
+    'x-gzip': 'gzip',
+    'zstd': 'zstd',
+}
+
+
+class UploadReader(io.RawIOBase):
+    """Flux en lecture seule qui compte les octets lus et peut en écrire une copie"""
+
+    def __init__(self, source: BinaryIO, copy: Optional[BinaryIO] = None) -> None:
+        super().__init__()
+        self.source = source
+        self.copy = copy
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        chunk = self.source.read(len(buffer))
+        size = len(chunk)
+        buffer[:size] = chunk
+        self.bytes_read += size
+        if self.copy is not None and size:
+            self.copy.write(chunk)
+        return size
+
+
+def upload_compression(filename: str, content_encoding: Optional[str] = None) -> Optional[str]:
+    """Compression d'un envoi ('gzip', 'zstd' ou None), d'après son en-tête ou son nom"""
+    if content_encoding:
+        return COMPRESSIONS.get(content_encoding.strip().lower())
+    for suffix in ('.gz', '.zst'):
+        if filename.lower().endswith(suffix):
+            return COMPRESSIONS[suffix]
+    return None
+
+
+def csv_name(filename: str) -> str:
+    """Nom de la copie décompressée d'un envoi"""
+    for suffix in ('.gz', '.zst'):
+        if filename.lower().endswith(suffix):
+            filename = filename[:-len(suffix)]
+    return filename if filename.lower().endswith('.csv') else f"{filename}.csv"
+
+
+def open_upload(stream: BinaryIO, compression: Optional[str]) -> BinaryIO:
+    """Flux décompressé au fil de la lecture"""
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=stream, mode='rb')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ValueError("La décompression zstd nécessite le module zstandard (pip install zstandard).")
+        return zstandard.ZstdDecompressor().stream_reader(stream)
+    return stream
@@ -12,12 +12,34 @@ import sys
 import json
 import csv
 import io
+import zlib
+import threading
+from argparse import Namespace
 from datetime import datetime
-from contextlib import redirect_stdout
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, session
+from urllib.parse import quote
+from collections import OrderedDict
+from flask import (Flask, Response, render_template, request, redirect, url_for, flash, jsonify, abort,
+                   session, get_flashed_messages, stream_with_context)
+
+# Encodeur JSON rapide pour l'API, optionnel (pip install orjson)
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Importer les fonctions d'analyse depuis le script existant
-from parse_zbx_problems import read_csv_file, filter_data, count_alerts, show_stats, parse_args
+from parse_zbx_problems import (load_csv_table, read_csv_stream, prepare_table, count_result, stats_result,
+                                timeline_result, duration_result, format_data, table_rows, column_getter,
+                                filter_key, dataset_table, filtered_views, CSVLoadError, NUMERIC_FIELDS,
+                                NGRAM_FIELDS, STATS_GROUPS, FilterSpec, FilterCache)
+from alert_table import MISSING
+from shared_dataset import SharedDataset
+from result_store import ResultStore, result_key
+from load_jobs import LoadJobs, DONE, FAILED
+from upload_stream import UploadReader, upload_compression, csv_name, open_upload
+from export_watcher import ExportWatcher
+from table_cache import source_signature, store_cached, cached_summary, cached_ngrams
+from partitions import PartitionedDataset, expand_sources, is_multi_source, table_summary
 
 # Créer l'application Flask
 app = Flask(__name__)
@@ -26,10 +48,66 @@ app.secret_key = os.urandom(24)  # Requis pour les sessions et les messages flas
 # Configuration
 DEFAULT_CSV = "zbx_problems_export.csv"
 DATA_DIR = "data"
+DATASET_DIR = os.path.join(DATA_DIR, ".dataset")
+DEFAULT_COLUMNS = "Sévérité,Temps,État,Hôte,Titre,Durée"
+
+# Pagination des résultats: taille par défaut et taille maximale d'une page
+RESULTS_PAGE_SIZE = 100
+RESULTS_MAX_PAGE_SIZE = 1000
 
 # Variables globales
 global_data = None
 
+def open_partitions(paths):
+    """Jeu de données formé des exports publiés par publish_sources: chaque partition est relue
+    de son cache (avec ses index de trigrammes) par la première requête dont les filtres la concernent"""
+    return PartitionedDataset(paths, lambda path: load_csv_table(path, ngram_index=True), numeric=NUMERIC_FIELDS)
+
+# Export chargé, partagé entre les processus du serveur (gunicorn -w N).
+# Les index de trigrammes sont construits avant la publication et projetés avec la table;
+# un répertoire ou un motif glob est publié comme jeu de données partitionné.
+dataset = SharedDataset(DATASET_DIR, NUMERIC_FIELDS,
+                        prepare=lambda table: table.build_ngram_indexes(NGRAM_FIELDS),
+                        open_sources=open_partitions)
+
+# Chargements en arrière-plan, dont l'état est lisible par tous les processus
+load_jobs = LoadJobs(os.path.join(DATA_DIR, ".jobs"))
+
+# Lignes retenues par les derniers jeux de filtres, réutilisées par les résultats,
+# les comptages et les exports
+filter_cache = FilterCache()
+
+# Résultats affichés, conservés côté serveur: la session ne contient que leur clé.
+# Les résultats évincés de la mémoire débordent dans data/.results.
+results_store = ResultStore(
+    int(os.environ.get('RRF_RESULT_CACHE_MB', '256')) * 1024 * 1024,
+    spill_dir=os.path.join(DATA_DIR, ".results"),
+    max_disk_bytes=int(os.environ.get('RRF_RESULT_SPILL_MB', '1024')) * 1024 * 1024
+)
+
+# Exports envoyés en flux: types MIME par format et taille des morceaux envoyés
+EXPORT_MIMETYPES = {'csv': 'text/csv', 'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# API: nombre d'alertes renvoyées par défaut et au plus par requête
+API_DEFAULT_LIMIT = 1000
+API_MAX_LIMIT = 100000
+
+# Surveillance des exports déposés (RRF_WATCH=0 pour la désactiver). Un export
+# déposé est pré-parsé dans le cache, puis publié selon RRF_WATCH_PROMOTE:
+# 'none' jamais, 'current' s'il s'agit du fichier servi (réexport), 'latest' toujours
+WATCH_ENABLED = os.environ.get('RRF_WATCH', '1') != '0'
+WATCH_PROMOTE = os.environ.get('RRF_WATCH_PROMOTE', 'current')
+watcher = ExportWatcher(['.', DATA_DIR],
+                        on_landed=lambda path: load_jobs.start(path, lambda job: refresh_export(path, job)),
+                        lock_path=os.path.join(DATA_DIR, '.watcher.lock'))
+
+# Ordres de tri des derniers résultats paginés: (génération, filtres, tri) -> lignes
+# (partagés par les threads du serveur: accès sous sorted_lock, tri hors verrou)
+SORTED_CACHE_SIZE = 8
+sorted_cache = OrderedDict()
+sorted_lock = threading.Lock()
+
 # Style Cyberpunk aux couleurs de la France
 class CyberpunkStyle:
     """Classe pour définir les couleurs cyberpunk aux couleurs de la France"""
@@ -48,6 +126,21 @@ class CyberpunkStyle:
 # Créer les dossiers nécessaires
 os.makedirs(DATA_DIR, exist_ok=True)
 
+def filter_session_data(filters):
+    """Filtrer l'export chargé selon les filtres de la session (résultat mémorisé par filter_cache)"""
+    spec = FilterSpec.from_mapping(filters)
+    return spec, filter_cache.filter(global_data, spec, dataset.generation)
+
+@app.before_request
+def sync_dataset():
+    """Passer à l'export publié par un autre processus s'il a changé"""
+    global global_data
+    if WATCH_ENABLED:
+        watcher.start()
+    table = dataset.refresh()
+    if table is not None:
+        global_data = table
+
 @app.route('/')
 def index():
     """Page d'accueil"""
@@ -57,31 +150,117 @@ def index():
     count_options = ['severite', 'hote', 'etat', 'type', 'team', 'namespace', 'hostname', 'hostname_short']
     formats = ['table', 'json', 'detail', 'csv']
     
-    # Récupérer la liste des fichiers CSV disponibles
-    csv_files = [f for f in os.listdir('.') if f.endswith('.csv')]
-    csv_files += [f for f in os.listdir(DATA_DIR) if f.endswith('.csv')]
+    # Liste des fichiers CSV disponibles, tenue à jour par la surveillance des répertoires
+    csv_files = watcher.listing()
     
     # Valeurs par défaut
     default_columns = "Sévérité,Temps,État,Hôte,Titre,Durée"
     
+    # Chargement lancé depuis cette session: message à la fin, progression sinon
+    load_job = None
+    if 'load_job' in session:
+        status = load_jobs.get(session['load_job'])
+        if status is None or status['state'] in (DONE, FAILED):
+            session.pop('load_job')
+        else:
+            load_job = status
+        if status is not None and status['state'] == DONE:
+            flash(f"Fichier CSV chargé avec succès. {status['rows']} alertes trouvées.", "success")
+        elif status is not None and status['state'] == FAILED:
+            flash(f"Erreur lors du chargement du fichier CSV: {status['error']}", "error")
+    
     return render_template(
         'index.html',
         style=CyberpunkStyle,
         csv_files=csv_files,
         default_csv=DEFAULT_CSV,
+        data_dir=DATA_DIR,
         etats=etats,
         severites=severites,
         count_options=count_options,
         formats=formats,
         default_columns=default_columns,
-        data_loaded=(global_data is not None)
+        data_loaded=(global_data is not None),
+        load_job=load_job
     )
 
+def source_size(csv_path):
+    """Taille totale des exports désignés par un chemin, un répertoire ou un motif glob"""
+    return sum(os.path.getsize(path) for path in expand_sources(csv_path) if os.path.isfile(path))
+
+def cache_sources(csv_path, job):
+    """Mettre en cache les exports désignés par csv_path (répertoire ou motif glob), sans les garder chargés
+
+    Seuls les exports nouveaux, modifiés ou mis en cache sans leurs index de
+    trigrammes sont parsés (ou relus): pour les autres, seul le résumé est lu
+    dans l'en-tête du cache. Retourne les chemins et le nombre total de lignes.
+    """
+    paths = expand_sources(csv_path)
+    if not paths:
+        raise CSVLoadError(f"Erreur: Aucun fichier CSV ne correspond à {csv_path}.")
+    fieldnames = None
+    rows_done = bytes_done = 0
+    for path in paths:
+        signature = source_signature(path) if os.path.exists(path) else None
+        summary = cached_summary(path, signature) if signature else None
+        if summary is None or not cached_ngrams(path, signature):
+            data = load_csv_table(path, ngram_index=True, progress=lambda rows, bytes_read: load_jobs.update(
+                job, rows_done + rows, bytes_done + bytes_read))
+            summary = table_summary(data)
+        if fieldnames is not None and summary['fields'] != fieldnames:
+            raise CSVLoadError(f"Erreur lors de la lecture du fichier CSV: colonnes différentes "
+                               f"d'un export à l'autre: {', '.join(summary['fields'])}")
+        fieldnames = summary['fields']
+        rows_done += summary['rows']
+        bytes_done += os.path.getsize(path)
+        load_jobs.update(job, rows_done, bytes_done)
+    return paths, rows_done
+
+def load_dataset(csv_path, job):
+    """Parser un export (ou les exports d'un répertoire ou d'un motif glob) et le publier
+    comme nouvel export chargé (exécuté par load_jobs)
+
+    Les exports d'un répertoire ou d'un motif sont publiés comme jeu de
+    données partitionné: les filtres n'en chargent que les partitions dont
+    le résumé n'exclut pas une correspondance.
+    """
+    if is_multi_source(csv_path):
+        paths, rows = cache_sources(csv_path, job)
+        dataset.publish_sources(paths, csv_path, rows)
+        return dataset.generation
+    signature = source_signature(csv_path) if os.path.exists(csv_path) else None
+    data = load_csv_table(csv_path, progress=lambda rows, bytes_read: load_jobs.update(job, rows, bytes_read))
+    data.build_indexes(NGRAM_FIELDS)
+    dataset.publish(data, csv_path, signature)
+    return dataset.generation
+
+def refresh_export(csv_path, job):
+    """Pré-parser un export déposé dans le cache et le publier selon WATCH_PROMOTE (exécuté par load_jobs)"""
+    dataset.refresh()
+    source = dataset.source
+    signature = source_signature(csv_path)
+    served = [os.path.abspath(path) for path in expand_sources(source)] if source is not None else []
+    current = os.path.abspath(csv_path) in served
+    if current and dataset.signature == signature:
+        # Export déjà servi (chargé ou envoyé depuis l'interface)
+        return None
+    if load_jobs.claimed(csv_path):
+        # Copie d'un envoi en cours: ingest_upload la met en cache et la publie lui-même
+        return None
+    if WATCH_PROMOTE == 'current' and current and is_multi_source(source):
+        # Export d'un répertoire ou d'un motif servi: republication de l'ensemble,
+        # dont seul cet export est parsé
+        return load_dataset(source, job)
+    data = load_csv_table(csv_path, progress=lambda rows, bytes_read: load_jobs.update(job, rows, bytes_read))
+    if not (WATCH_PROMOTE == 'latest' or (WATCH_PROMOTE == 'current' and current)):
+        return None
+    data.build_indexes(NGRAM_FIELDS)
+    dataset.publish(data, csv_path, signature)
+    return dataset.generation
+
 @app.route('/load_csv', methods=['POST'])
 def load_csv():
-    """Charger un fichier CSV"""
-    global global_data
-    
+    """Lancer le chargement d'un fichier CSV en arrière-plan"""
     # Récupérer le chemin du fichier depuis le formulaire
     csv_path = request.form.get('csv_path', DEFAULT_CSV)
     
@@ -92,15 +271,79 @@ def load_csv():
         uploaded_file.save(file_path)
         csv_path = file_path
     
-    # Charger le fichier CSV
-    try:
-        global_data = read_csv_file(csv_path)
-        flash(f"Fichier CSV chargé avec succès. {len(global_data)} alertes trouvées.", "success")
-    except Exception as e:
-        flash(f"Erreur lors du chargement du fichier CSV: {str(e)}", "error")
+    # Le chargement se poursuit après la réponse; l'export précédent reste servi jusqu'à sa fin
+    job = load_jobs.start(csv_path, lambda job: load_dataset(csv_path, job), source_size(csv_path))
+    status_url = url_for('load_status', job_id=job.id)
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(dict(job.status(), status_url=status_url)), 202, {'Location': status_url}
     
+    session['load_job'] = job.id
     return redirect(url_for('index'))
 
+def ingest_upload(stream, compression, copy_path, job):
+    """Parser un export au fil de sa réception, en écrivant sa copie décompressée dans copy_path
+
+    La copie est réservée (load_jobs.claim) jusqu'à la publication, pour que
+    la surveillance de DATA_DIR ne la parse pas une seconde fois.
+    """
+    if not copy_path:
+        return receive_upload(stream, compression, copy_path, job)
+    with load_jobs.claim(copy_path):
+        return receive_upload(stream, compression, copy_path, job)
+
+def receive_upload(stream, compression, copy_path, job):
+    """Corps de ingest_upload: parsing, copie, mise en cache et publication"""
+    received = UploadReader(stream)
+    temp_path = f"{copy_path}.{job.id}.tmp" if copy_path else None
+    copy = open(temp_path, 'wb') if temp_path else None
+    try:
+        body = UploadReader(open_upload(received, compression), copy)
+        data = read_csv_stream(io.BufferedReader(body), lambda rows: load_jobs.update(job, rows, received.bytes_read))
+        load_jobs.update(job, len(data), received.bytes_read)
+    except Exception as e:
+        if copy is not None:
+            copy.close()
+            os.remove(temp_path)
+        raise CSVLoadError(f"Erreur lors de la lecture du fichier CSV: {e}") from e
+    signature = None
+    if copy is not None:
+        copy.close()
+        os.replace(temp_path, copy_path)
+    prepare_table(data)
+    if copy_path:
+        # La copie est mise en cache: la surveillance de DATA_DIR n'aura pas à la reparser
+        signature = source_signature(copy_path)
+        store_cached(copy_path, signature, data, table_summary(data))
+    data.build_indexes(NGRAM_FIELDS)
+    dataset.publish(data, copy_path or job.source, signature)
+    return dataset.generation
+
+@app.route('/upload_csv', methods=['POST', 'PUT'])
+def upload_csv():
+    """Charger un export envoyé comme corps de la requête, parsé au fil de la réception
+
+    Paramètres: name (nom du fichier), copy=0 pour ne pas en garder de copie
+    dans DATA_DIR. Les envois gzip ou zstd (Content-Encoding ou suffixe .gz,
+    .zst) sont décompressés à la volée.
+    """
+    filename = os.path.basename(request.args.get('name', '')) or f"upload_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    compression = upload_compression(filename, request.headers.get('Content-Encoding'))
+    copy_path = os.path.join(DATA_DIR, csv_name(filename)) if request.args.get('copy', '1') != '0' else None
+    
+    job = load_jobs.run(copy_path or filename, request.content_length or 0,
+                        lambda job: ingest_upload(request.stream, compression, copy_path, job))
+    # Résultat affiché par la page d'accueil au prochain affichage
+    session['load_job'] = job.id
+    return jsonify(job.status()), 400 if job.state == FAILED else 201
+
+@app.route('/load_status/<job_id>')
+def load_status(job_id):
+    """Progression d'un chargement: lignes parsées, octets lus et débit"""
+    status = load_jobs.get(job_id)
+    if status is None:
+        return jsonify({'error': "Chargement inconnu."}), 404
+    return jsonify(status)
+
 @app.route('/apply_filters', methods=['POST'])
 def apply_filters():
     """Appliquer les filtres et afficher les résultats"""
@@ -110,99 +353,144 @@ def apply_filters():
         flash("Veuillez d'abord charger un fichier CSV.", "warning")
         return redirect(url_for('index'))
     
-    # Créer un Namespace pour simuler les arguments
-    args = parse_args()
-    
     # Récupérer les filtres depuis le formulaire
-    args.severite = request.form.get('severite', '')
-    args.hote = request.form.get('hote', '')
-    args.hostname = request.form.get('hostname', '')
-    args.hostname_short = request.form.get('hostname_short', '')
-    args.team = request.form.get('team', '')
-    args.namespace = request.form.get('namespace', '')
-    args.etat = request.form.get('etat', '')
-    args.tag = request.form.get('tag', '')
-    args.texte = request.form.get('texte', '')
-    args.date_debut = request.form.get('date_debut', '')
-    args.date_fin = request.form.get('date_fin', '')
-    args.duree_min = request.form.get('duree_min', '')
-    args.duree_max = request.form.get('duree_max', '')
-    args.format = request.form.get('format', 'table')
-    args.columns = request.form.get('columns', 'Sévérité,Temps,État,Hôte,Titre,Durée')
-    
-    # Filtrer les données
-    filtered_data = filter_data(global_data, args)
-    
-    # Capturer la sortie de la fonction display_data
-    f = io.StringIO()
-    with redirect_stdout(f):
-        from parse_zbx_problems import display_data
-        display_data(filtered_data, args)
-        print(f"\n{len(filtered_data)} alertes trouvées sur un total de {len(global_data)}.")
-    
-    # Sauvegarder les résultats et les filtres dans la session
-    session['results'] = f.getvalue()
-    session['filters'] = {
-        'severite': args.severite,
-        'hote': args.hote,
-        'hostname': args.hostname,
-        'hostname_short': args.hostname_short,
-        'team': args.team,
-        'namespace': args.namespace,
-        'etat': args.etat,
-        'tag': args.tag,
-        'texte': args.texte,
-        'date_debut': args.date_debut,
-        'date_fin': args.date_fin,
-        'duree_min': args.duree_min,
-        'duree_max': args.duree_max,
-        'format': args.format,
-        'columns': args.columns
+    filters = {
+        'severite': request.form.get('severite', ''),
+        'hote': request.form.get('hote', ''),
+        'hostname': request.form.get('hostname', ''),
+        'hostname_short': request.form.get('hostname_short', ''),
+        'team': request.form.get('team', ''),
+        'namespace': request.form.get('namespace', ''),
+        'etat': request.form.get('etat', ''),
+        'tag': request.form.get('tag', ''),
+        'texte': request.form.get('texte', ''),
+        'date_debut': request.form.get('date_debut', ''),
+        'date_fin': request.form.get('date_fin', ''),
+        'duree_min': request.form.get('duree_min', ''),
+        'duree_max': request.form.get('duree_max', ''),
+        'format': request.form.get('format', 'table'),
+        'columns': request.form.get('columns', 'Sévérité,Temps,État,Hôte,Titre,Durée')
     }
     
-    # Convertir les données pour l'affichage en tableau
-    if args.format == 'table':
-        columns = args.columns.split(',')
-        table_data = []
-        for row in filtered_data:
-            table_row = {}
-            for col in columns:
-                if col == 'Titre':
-                    table_row[col] = row['Problème_parsed']['titre']
-                elif col in ['Condition', 'Action', 'Impact']:
-                    table_row[col] = row['Problème_parsed'][col.lower()]
-                elif col in ['Hostname', 'Team', 'Namespace', 'hostname_short']:
-                    key = col.lower() if col not in ['Hostname'] else 'hostname'
-                    table_row[col] = row.get(key, 'N/A')
-                elif col == 'Hôte':
-                    table_row[col] = row.get('hostname', row.get('Hôte', 'N/A'))
-                else:
-                    table_row[col] = row.get(col, '')
-            table_data.append(table_row)
-        session['table_data'] = {
-            'columns': columns,
-            'data': table_data
-        }
+    # Les critères invalides sont ignorés par le filtrage
+    for error in FilterSpec.from_mapping(filters).errors:
+        flash(error, "warning")
+    
+    # Sauvegarder les filtres dans la session et préparer la première page
+    session['filters'] = filters
+    store_results(filters)
     
     return redirect(url_for('results'))
 
+def sort_key(data, col):
+    """Clé de tri des lignes pour une colonne du tableau
+
+    Le temps et la durée sont triés selon leurs colonnes numériques, les
+    temps illisibles en dernier.
+    """
+    if col == 'Temps':
+        epochs = data.numeric['Temps_epoch']
+        return lambda row_id: (epochs[row_id] == MISSING, epochs[row_id])
+    if col == 'Durée':
+        return data.numeric['Durée_minutes'].__getitem__
+    getter = column_getter(data, col)
+    return lambda row_id: str(getter(row_id) or '')
+
+def sorted_rows(filters, sort):
+    """Identifiants des lignes filtrées, dans l'ordre demandé (mémorisés pour les pages suivantes)"""
+    spec, filtered_data = filter_session_data(filters)
+    column = sort.lstrip('-')
+    if column not in filters.get('columns', DEFAULT_COLUMNS).split(','):
+        return filtered_data.row_ids()
+    key = (dataset.generation, filter_key(spec), sort)
+    with sorted_lock:
+        row_ids = sorted_cache.get(key)
+        if row_ids is not None:
+            sorted_cache.move_to_end(key)
+            return row_ids
+    row_ids = sorted(filtered_data.row_ids(), key=sort_key(filtered_data, column), reverse=sort.startswith('-'))
+    with sorted_lock:
+        sorted_cache[key] = row_ids
+        while len(sorted_cache) > SORTED_CACHE_SIZE:
+            sorted_cache.popitem(last=False)
+    return row_ids
+
+def store_results(filters, page=1, size=RESULTS_PAGE_SIZE, sort=''):
+    """Calculer et enregistrer une page des résultats affichés par /results; retourne sa clé"""
+    key = result_key(dataset.generation, 'results', dict(filters, page=page, size=size, sort=sort))
+    if results_store.get(key) is not None:
+        return key
+    
+    # Filtrer et trier les données, puis ne garder que les lignes de la page
+    _, filtered_data = filter_session_data(filters)
+    args = Namespace(format=filters.get('format', 'table'), columns=filters.get('columns', DEFAULT_COLUMNS), raw=False)
+    row_ids = sorted_rows(filters, sort)
+    pages = max(1, -(-len(row_ids) // size))
+    page = min(page, pages)
+    page_data = filtered_data.take(row_ids[(page - 1) * size:page * size])
+    
+    # Texte du format brut de la page, tel que l'afficherait la ligne de commande
+    raw = ''.join(f"{block}\n" for block in format_data(page_data, args))
+    raw += f"\n{len(filtered_data)} alertes trouvées sur un total de {len(global_data)}.\n"
+    
+    # Lignes de la page pour l'affichage en tableau
+    table_data = None
+    if args.format == 'table':
+        columns = args.columns.split(',')
+        table_data = {'columns': columns, 'data': table_rows(page_data, columns)}
+    
+    results_store.put(key, {
+        'results': raw,
+        'table_data': table_data,
+        'page': page,
+        'pages': pages,
+        'size': size,
+        'sort': sort,
+        'count': len(filtered_data),
+        'total': len(global_data)
+    })
+    return key
+
+def stream_page(template_name, **context):
+    """Rendre un template en flux: le début de la page est envoyé avant la fin du rendu
+
+    Les messages flash sont lus avant l'envoi, la session ne pouvant plus
+    être modifiée une fois les en-têtes partis.
+    """
+    get_flashed_messages(with_categories=True)
+    app.update_template_context(context)
+    template = app.jinja_env.get_template(template_name)
+    return Response(stream_with_context(template.generate(context)))
+
 @app.route('/results')
 def results():
-    """Afficher les résultats"""
-    if 'results' not in session:
+    """Afficher une page des résultats (paramètres page, size et sort, format=json)"""
+    filters = session.get('filters')
+    page = max(request.args.get('page', 1, type=int), 1)
+    size = min(max(request.args.get('size', RESULTS_PAGE_SIZE, type=int), 1), RESULTS_MAX_PAGE_SIZE)
+    sort = request.args.get('sort', '')
+    
+    result = None
+    if filters is not None:
+        key = result_key(dataset.generation, 'results', dict(filters, page=page, size=size, sort=sort))
+        result = results_store.get(key)
+        if result is None and global_data is not None:
+            result = results_store.get(store_results(filters, page, size, sort))
+    
+    if result is None:
         flash("Aucun résultat à afficher. Veuillez d'abord appliquer des filtres.", "warning")
         return redirect(url_for('index'))
     
-    results = session.get('results', '')
-    filters = session.get('filters', {})
-    table_data = session.get('table_data', None)
+    if request.args.get('format') == 'json':
+        return jsonify(result)
     
-    return render_template(
+    return stream_page(
         'results.html',
         style=CyberpunkStyle,
-        results=results,
+        results=result['results'],
         filters=filters,
-        table_data=table_data
+        table_data=result['table_data'],
+        page=result
     )
 
 @app.route('/stats')
@@ -233,13 +521,9 @@ def show_full_stats():
         flash("Veuillez d'abord charger un fichier CSV.", "warning")
         return redirect(url_for('stats'))
     
-    # Capturer la sortie de la fonction show_stats
-    f = io.StringIO()
-    with redirect_stdout(f):
-        show_stats(global_data)
-    
-    # Sauvegarder les résultats dans la session
-    session['stats_results'] = f.getvalue()
+    # Sauvegarder la demande et la clé des résultats dans la session
+    session['stats_request'] = {'count_by': '', 'filters': {}}
+    session['stats_key'] = store_stats('', {})
     
     return redirect(url_for('stats_results'))
 
@@ -259,144 +543,263 @@ def count_by_criteria():
         flash("Veuillez sélectionner un critère de groupement.", "warning")
         return redirect(url_for('stats'))
     
-    # Créer un Namespace pour simuler les arguments
-    args = parse_args()
-    
     # Récupérer les filtres actuels s'ils existent
     filters = session.get('filters', {})
-    args.severite = filters.get('severite', '')
-    args.hote = filters.get('hote', '')
-    args.hostname = filters.get('hostname', '')
-    args.hostname_short = filters.get('hostname_short', '')
-    args.team = filters.get('team', '')
-    args.namespace = filters.get('namespace', '')
-    args.etat = filters.get('etat', '')
-    args.tag = filters.get('tag', '')
-    args.texte = filters.get('texte', '')
-    args.date_debut = filters.get('date_debut', '')
-    args.date_fin = filters.get('date_fin', '')
-    args.duree_min = filters.get('duree_min', '')
-    args.duree_max = filters.get('duree_max', '')
-    
-    # Filtrer les données
-    filtered_data = filter_data(global_data, args)
-    
-    # Capturer la sortie de la fonction count_alerts
-    f = io.StringIO()
-    with redirect_stdout(f):
-        count_alerts(filtered_data, criteria)
-    
-    # Sauvegarder les résultats et le critère dans la session
-    session['stats_results'] = f.getvalue()
-    session['count_criteria'] = criteria
+    
+    # Sauvegarder la demande et la clé des résultats dans la session
+    session['stats_request'] = {'count_by': criteria, 'filters': filters}
+    session['stats_key'] = store_stats(criteria, filters)
     
     return redirect(url_for('stats_results'))
 
+def store_stats(criteria, filters):
+    """Calculer les statistiques complètes (sans critère) ou un comptage filtré; retourne la clé du résultat"""
+    key = result_key(dataset.generation, 'stats', dict(filters, count_by=criteria) if criteria else {})
+    if results_store.get(key) is not None:
+        return key
+    
+    if not criteria:
+        # Toutes les lignes: pour un jeu partitionné, toutes les partitions sont chargées
+        result = {'criteria': criteria, 'stats': stats_result(dataset_table(global_data))}
+    else:
+        # Filtrer les données
+        _, filtered_data = filter_session_data(filters)
+        result = {'criteria': criteria, 'count': count_result(filtered_data, criteria)}
+    
+    results_store.put(key, result)
+    return key
+
 @app.route('/stats_results')
 def stats_results():
     """Afficher les résultats des statistiques"""
-    if 'stats_results' not in session:
+    stats_request = session.get('stats_request')
+    result = results_store.get(session.get('stats_key'))
+    if result is None and stats_request is not None and global_data is not None:
+        # Résultat évincé, calculé par un autre processus ou d'un export précédent
+        session['stats_key'] = store_stats(stats_request['count_by'], stats_request['filters'])
+        result = results_store.get(session['stats_key'])
+    
+    if result is None:
         flash("Aucun résultat à afficher. Veuillez d'abord générer des statistiques.", "warning")
         return redirect(url_for('stats'))
     
-    results = session.get('stats_results', '')
-    criteria = session.get('count_criteria', '')
-    
     return render_template(
         'stats_results.html',
         style=CyberpunkStyle,
-        results=results,
-        criteria=criteria
+        criteria=result['criteria'],
+        stats=result.get('stats'),
+        count=result.get('count')
     )
 
+def export_chunks(data, export_format, columns):
+    """Générer l'export des lignes par morceaux d'environ EXPORT_CHUNK_SIZE caractères encodés en UTF-8
+
+    Le JSON est identique à json.dump(..., indent=2) de la liste des lignes,
+    le NDJSON contient une ligne par alerte.
+    """
+    buffer = io.StringIO()
+    
+    def take():
+        chunk = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+    
+    if export_format == 'json':
+        separator = '[\n  '
+        for row_id in data.row_ids():
+            buffer.write(separator)
+            buffer.write(json.dumps(data.row(row_id), indent=2, ensure_ascii=False).replace('\n', '\n  '))
+            separator = ',\n  '
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield take()
+        buffer.write('[]' if separator == '[\n  ' else '\n]')
+    elif export_format == 'ndjson':
+        for row_id in data.row_ids():
+            buffer.write(json.dumps(data.row(row_id), ensure_ascii=False))
+            buffer.write('\n')
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield take()
+    else:  # CSV par défaut
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        getters = [column_getter(data, col) for col in columns]
+        for row_id in data.row_ids():
+            writer.writerow([getter(row_id) for getter in getters])
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield take()
+    yield take()
+
+def gzip_chunks(chunks):
+    """Compresser un flux au format gzip, chaque morceau étant envoyé dès qu'il est compressé"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
 @app.route('/export_results', methods=['POST'])
 def export_results():
-    """Exporter les résultats"""
+    """Exporter les résultats en flux (CSV, JSON ou NDJSON, compression gzip optionnelle)"""
     global global_data
     
     if global_data is None:
         flash("Veuillez d'abord charger un fichier CSV.", "warning")
         return redirect(url_for('index'))
     
-    # Récupérer le format et le nom du fichier
+    # Récupérer le format, la compression et le nom du fichier
     export_format = request.form.get('export_format', 'csv')
+    if export_format not in EXPORT_MIMETYPES:
+        export_format = 'csv'
+    compression = request.form.get('compression', '')
     filename = request.form.get('filename', f'export_{datetime.now().strftime("%Y%m%d_%H%M%S")}')
     
     # Ajouter l'extension si nécessaire
     if not filename.endswith(f'.{export_format}'):
         filename = f"{filename}.{export_format}"
     
-    # Créer un Namespace pour simuler les arguments
-    args = parse_args()
-    
-    # Récupérer les filtres actuels
+    # Filtrer les données selon les filtres actuels
     filters = session.get('filters', {})
-    args.severite = filters.get('severite', '')
-    args.hote = filters.get('hote', '')
-    args.hostname = filters.get('hostname', '')
-    args.hostname_short = filters.get('hostname_short', '')
-    args.team = filters.get('team', '')
-    args.namespace = filters.get('namespace', '')
-    args.etat = filters.get('etat', '')
-    args.tag = filters.get('tag', '')
-    args.texte = filters.get('texte', '')
-    args.date_debut = filters.get('date_debut', '')
-    args.date_fin = filters.get('date_fin', '')
-    args.duree_min = filters.get('duree_min', '')
-    args.duree_max = filters.get('duree_max', '')
-    args.format = export_format
-    args.columns = filters.get('columns', 'Sévérité,Temps,État,Hôte,Titre,Durée')
-    
-    # Filtrer les données
-    filtered_data = filter_data(global_data, args)
-    
-    # Chemin du fichier d'export
-    export_path = os.path.join(DATA_DIR, filename)
-    
+    _, filtered_data = filter_session_data(filters)
+    columns = filters.get('columns', DEFAULT_COLUMNS).split(',')
+    
+    # Les lignes sont envoyées au fil de l'eau, sans fichier intermédiaire
+    chunks = export_chunks(filtered_data, export_format, columns)
+    mimetype = EXPORT_MIMETYPES[export_format]
+    if compression == 'gzip':
+        chunks = gzip_chunks(chunks)
+        filename = f"{filename}.gz"
+        mimetype = 'application/gzip'
+    return Response(chunks, mimetype=mimetype,
+                    headers={'Content-Disposition': f"attachment; filename*=UTF-8''{quote(filename)}"})
+
+def encode_json(value):
+    """Encoder une réponse de l'API en JSON compact (orjson s'il est installé)"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def api_error(message, status):
+    """Réponse d'erreur de l'API"""
+    return Response(encode_json({'error': message}), status=status, mimetype='application/json')
+
+def api_filtered(kind, views=False):
+    """Alertes retenues par les filtres passés en paramètres, et ETag de la réponse
+
+    L'ETag dépend de la génération de l'export et des paramètres: la requête
+    est interrompue par 304 Not Modified si le client possède déjà la réponse,
+    ou par une erreur JSON si les paramètres sont invalides. Avec views, les
+    alertes sont une liste de vues, une par partition retenue d'un jeu
+    partitionné (leurs agrégats horaires et distributions sont fusionnés).
+    """
+    if global_data is None:
+        abort(api_error("Aucun fichier CSV chargé.", 503))
+    etag = result_key(dataset.generation, kind, request.args.to_dict())
+    if etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        abort(response)
+    spec = FilterSpec.from_mapping(request.args)
+    if spec.errors:
+        abort(api_error(' '.join(spec.errors), 400))
+    if views and isinstance(global_data, PartitionedDataset):
+        return filtered_views(global_data, spec), etag
+    data = filter_cache.filter(global_data, spec, dataset.generation)
+    return ([data] if views else data), etag
+
+def api_response(body, etag, mimetype='application/json'):
+    """Réponse de l'API, revalidée par le client à chaque interrogation"""
+    response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def ndjson_chunks(rows):
+    """Encoder des lignes en NDJSON, par paquets de 1000 lignes"""
+    batch = []
+    for row in rows:
+        batch.append(encode_json(row))
+        if len(batch) == 1000:
+            yield b'\n'.join(batch) + b'\n'
+            batch = []
+    if batch:
+        yield b'\n'.join(batch) + b'\n'
+
+@app.route('/api/v1/alerts')
+def api_alerts():
+    """Alertes filtrées, avec projection (columns), pagination (limit, offset) et format json ou ndjson"""
+    data, etag = api_filtered('alerts')
+    limit = request.args.get('limit', API_DEFAULT_LIMIT, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    if not 0 <= limit <= API_MAX_LIMIT or offset < 0:
+        return api_error(f"limit doit être compris entre 0 et {API_MAX_LIMIT}, offset doit être positif.", 400)
+    
+    page = data.take(data.row_ids()[offset:offset + limit])
+    columns = request.args.get('columns')
+    rows = table_rows(page, columns.split(',')) if columns else page.to_records()
+    
+    if request.args.get('format') == 'ndjson':
+        return api_response(ndjson_chunks(rows), etag, 'application/x-ndjson')
+    return api_response(encode_json({
+        'generation': dataset.generation,
+        'total': len(data),
+        'offset': offset,
+        'limit': limit,
+        'alerts': rows
+    }), etag)
+
+@app.route('/api/v1/count')
+def api_count():
+    """Comptage des alertes filtrées selon le critère count_by (total seul sans critère)"""
+    data, etag = api_filtered('count')
+    group_by = request.args.get('count_by') or None
+    if group_by is not None and group_by not in STATS_GROUPS:
+        return api_error(f"count_by doit être l'un de: {', '.join(STATS_GROUPS)}.", 400)
+    return api_response(encode_json(dict(count_result(data, group_by), generation=dataset.generation)), etag)
+
+@app.route('/api/v1/stats')
+def api_stats():
+    """Statistiques détaillées des alertes filtrées"""
+    data, etag = api_filtered('stats')
+    return api_response(encode_json(dict(stats_result(data), generation=dataset.generation)), etag)
+
+@app.route('/api/v1/timeline')
+def api_timeline():
+    """Nombre d'alertes filtrées par période (bucket: heure, jour, semaine, mois ou durée comme 6h),
+    réparti selon le critère by, lu dans les agrégats horaires de l'export"""
+    views, etag = api_filtered('timeline', views=True)
+    group_by = request.args.get('by') or None
+    if group_by is not None and group_by not in STATS_GROUPS:
+        return api_error(f"by doit être l'un de: {', '.join(STATS_GROUPS)}.", 400)
     try:
-        # Exporter selon le format
-        if export_format == 'json':
-            with open(export_path, 'w', encoding='utf-8') as f:
-                json.dump(filtered_data, f, indent=2, ensure_ascii=False)
-        else:  # CSV par défaut
-            columns = args.columns.split(',')
-            with open(export_path, 'w', encoding='utf-8', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(columns)
-                for row in filtered_data:
-                    values = []
-                    for col in columns:
-                        if col == 'Titre':
-                            value = row['Problème_parsed']['titre']
-                        elif col in ['Condition', 'Action', 'Impact']:
-                            value = row['Problème_parsed'][col.lower()]
-                        elif col in ['Hostname', 'Team', 'Namespace', 'hostname_short']:
-                            key = col.lower() if col not in ['Hostname'] else 'hostname'
-                            value = row.get(key, 'N/A')
-                        elif col == 'Hôte':
-                            value = row.get('hostname', row.get('Hôte', 'N/A'))
-                        else:
-                            value = row.get(col, '')
-                        values.append(value)
-                    writer.writerow(values)
-        
-        flash(f"Les données ont été exportées avec succès dans {export_path}.", "success")
-        
-        # Télécharger le fichier
-        return send_file(export_path, as_attachment=True)
-    except Exception as e:
-        flash(f"Erreur lors de l'exportation: {str(e)}", "error")
-        return redirect(url_for('results'))
+        result = timeline_result(views, request.args.get('bucket', 'jour'), group_by)
+    except ValueError as e:
+        return api_error(str(e), 400)
+    return api_response(encode_json(dict(result, generation=dataset.generation)), etag)
+
+@app.route('/api/v1/durations')
+def api_durations():
+    """Distribution des durées des alertes filtrées (moyenne, p50, p90, p99, histogramme),
+    pour l'ensemble et par valeur du critère by"""
+    views, etag = api_filtered('durations', views=True)
+    group_by = request.args.get('by') or None
+    if group_by is not None and group_by not in STATS_GROUPS:
+        return api_error(f"by doit être l'un de: {', '.join(STATS_GROUPS)}.", 400)
+    return api_response(encode_json(dict(duration_result(views, group_by), generation=dataset.generation)), etag)
+
+@app.route('/cache_stats')
+def cache_stats():
+    """Compteurs des caches de filtres et de résultats"""
+    return jsonify({
+        'generation': dataset.generation,
+        'filters': filter_cache.stats(),
+        'results': results_store.stats()
+    })
 
 @app.route('/reset_filters', methods=['POST'])
 def reset_filters():
     """Réinitialiser les filtres"""
     if 'filters' in session:
         session.pop('filters')
-    if 'results' in session:
-        session.pop('results')
-    if 'table_data' in session:
-        session.pop('table_data')
     
     flash("Les filtres ont été réinitialisés.", "success")
     return redirect(url_for('index'))